@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""
+Micro-benchmarks of drf_guard permission classes.
+
+Runs offline on SQLite with the test project settings and reports per
+decision latency, memory allocated and database queries per request.
+
+    python benchmarks/bench_permissions.py [--iterations N] [--quick]
+"""
+import argparse
+import copy
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+django.setup()
+
+from django.contrib.auth.models import Group, Permission  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+from rest_framework.permissions import BasePermission, IsAuthenticated  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from drf_guard.compiler import Constant, compile_expression  # noqa: E402
+from drf_guard.operators import And, Or, Not, Reducer  # noqa: E402
+from drf_guard.permissions import (  # noqa: E402
+    HasRequiredAccessRules, HasRequiredGroups, HasRequiredPermissions
+)
+from tests.testapp.models import User  # noqa: E402
+
+
+class IsOwner(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return obj.pk == request.user.pk
+
+
+def build_expression(operands, width, depth, operators=(Or, And)):
+    """
+    Build a nested expression `width` operands wide and `depth` levels
+    deep, operators alternate between levels.
+    """
+    operator = operators[depth % len(operators)]
+    expression = []
+    for index in range(width):
+        if index:
+            expression.append(operator)
+        if depth > 1 and index == width - 1:
+            expression.append(build_expression(operands, width, depth - 1, operators))
+        else:
+            operand = operands[(depth * width + index) % len(operands)]
+            if index % 3 == 2:
+                expression.append(Not)
+            expression.append(operand)
+    return expression
+
+
+def fresh_user(user):
+    # Users are fetched on every request, so permission caches of
+    # authentication backends don't survive between requests
+    user = copy.copy(user)
+    for attr in ('_perm_cache', '_user_perm_cache', '_group_perm_cache'):
+        user.__dict__.pop(attr, None)
+    return user
+
+
+def make_requests(user, count):
+    factory = APIRequestFactory()
+    requests = []
+    for _ in range(count):
+        request = Request(factory.put('/'))
+        request.user = fresh_user(user)
+        requests.append(request)
+    return requests
+
+
+def make_view(access_rules):
+    view_class = type('BenchmarkView', (), {'action': 'update', 'access_rules': access_rules})
+    return view_class()
+
+
+def decide(permission, request, view, obj):
+    return (
+        permission.has_permission(request, view) and
+        permission.has_object_permission(request, view, obj)
+    )
+
+
+def measure(name, run, iterations, setup=None):
+    """
+    Measure `run(arg)` where `arg` is produced by `setup()` outside of
+    timed code, return a result row.
+    """
+    args = [setup() if setup else None for _ in range(iterations + 1)]
+
+    # Seeding fills the query log, once it's full new queries aren't counted
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        run(args.pop())
+
+    timings = []
+    for arg in args:
+        start = time.perf_counter()
+        run(arg)
+        timings.append(time.perf_counter() - start)
+
+    allocated = []
+    for arg in [setup() if setup else None for _ in range(min(iterations, 50))]:
+        tracemalloc.start()
+        run(arg)
+        allocated.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'name': name,
+        'mean': statistics.mean(timings) * 1e6,
+        'p50': timings[len(timings) // 2] * 1e6,
+        'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6,
+        'allocated': statistics.mean(allocated) / 1024,
+        'queries': len(queries),
+    }
+
+
+def seed(group_count, membership_size):
+    Group.objects.all().delete()
+    User.objects.all().delete()
+    Group.objects.bulk_create(
+        [Group(name='group%s' % index) for index in range(group_count)]
+    )
+    # Primary keys aren't set by `bulk_create` on all databases
+    groups = list(Group.objects.order_by('pk'))
+    user = User.objects.create(username='user')
+    user.groups.set(groups[:membership_size])
+    user.user_permissions.set(Permission.objects.all()[:10])
+    return user, [group.name for group in groups]
+
+
+def bench_reducer(iterations, widths, depths):
+    rows = []
+    for width in widths:
+        for depth in depths:
+            expression = build_expression([True, False], width, depth)
+
+            def reducer_eval(expression):
+                return Reducer()(
+                    reducer_eval(item) if isinstance(item, list)
+                    else item() if isinstance(item, type) else item
+                    for item in expression
+                )
+
+            compiled = compile_expression(expression, Constant)
+            label = 'width=%s depth=%s' % (width, depth)
+            rows.append(measure(
+                'Reducer.eval %s' % label,
+                lambda arg: reducer_eval(expression), iterations
+            ))
+            rows.append(measure(
+                'compiled.evaluate %s' % label,
+                lambda arg: compiled.evaluate(None), iterations
+            ))
+    return rows
+
+
+def bench_permissions(iterations, group_counts, membership_sizes, widths, depths):
+    rows = []
+    permission_names = [
+        'testapp.%s' % codename
+        for codename in Permission.objects.values_list('codename', flat=True)[:20]
+    ]
+    for group_count in group_counts:
+        for membership_size in membership_sizes:
+            if membership_size > group_count:
+                continue
+            user, group_names = seed(group_count, membership_size)
+            for width in widths:
+                for depth in depths:
+                    groups = build_expression(group_names[::-1], width, depth)
+                    permissions = [
+                        IsAuthenticated, And,
+                        build_expression(permission_names + [IsOwner], width, depth)
+                    ]
+                    view = make_view({
+                        'PUT': {
+                            'groups': groups,
+                            'permissions': permissions,
+                            'expression': ['groups', Or, 'permissions']
+                        }
+                    })
+                    label = 'groups=%s member_of=%s width=%s depth=%s' % (
+                        group_count, membership_size, width, depth
+                    )
+                    for permission_class in (
+                            HasRequiredGroups, HasRequiredPermissions, HasRequiredAccessRules):
+                        permission = permission_class()
+                        rows.append(measure(
+                            '%s %s' % (permission_class.__name__, label),
+                            lambda request: decide(permission, request, view, user),
+                            iterations,
+                            setup=lambda: make_requests(user, 1)[0]
+                        ))
+    return rows
+
+
+def print_rows(rows):
+    header = '%-80s %10s %10s %10s %12s %8s' % (
+        'benchmark', 'mean(us)', 'p50(us)', 'p99(us)', 'alloc(KiB)', 'queries'
+    )
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print('%-80s %10.1f %10.1f %10.1f %12.1f %8d' % (
+            row['name'], row['mean'], row['p50'], row['p99'],
+            row['allocated'], row['queries']
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--quick', action='store_true', help="Run a small matrix")
+    args = parser.parse_args()
+
+    if args.quick:
+        group_counts, membership_sizes, widths, depths = [10], [1], [2, 8], [1]
+    else:
+        group_counts = [10, 100, 1000]
+        membership_sizes = [1, 10, 100]
+        widths = [2, 8, 32]
+        depths = [1, 3]
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        rows = bench_reducer(args.iterations, widths, depths)
+        rows.extend(bench_permissions(
+            args.iterations, group_counts, membership_sizes, widths, depths
+        ))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    print_rows(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+"""
+End-to-end load scenario of drf_guard permission classes.
+
+Seeds thousands of groups, users who belong to many of them and many
+viewsets with large access rules, then drives mixed list/retrieve/update
+traffic through Django's test client offline on SQLite and reports
+throughput, p50/p99 latency and queries per request.
+
+    python benchmarks/load_scenario.py [--requests N] [--quick]
+"""
+import argparse
+import collections
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+django.setup()
+
+from django.conf.urls import include, url  # noqa: E402
+from django.contrib.auth.models import Group, Permission  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, override_settings, setup_test_environment
+)
+from rest_framework import routers, viewsets  # noqa: E402
+from rest_framework.permissions import IsAuthenticated  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from benchmarks.bench_permissions import fresh_user  # noqa: E402
+from drf_guard.operators import And, Or  # noqa: E402
+from drf_guard.permissions import (  # noqa: E402
+    HasRequiredAccessRules, HasRequiredGroups, HasRequiredPermissions
+)
+from tests.testapp.models import User  # noqa: E402
+from tests.testapp.permissions import IsSelfUser  # noqa: E402
+from tests.testapp.serializers import UserSerializer  # noqa: E402
+
+
+PERMISSION_CLASSES = (HasRequiredGroups, HasRequiredPermissions, HasRequiredAccessRules)
+# Share of each action in the traffic
+TRAFFIC = (('list', 0.3), ('retrieve', 0.5), ('update', 0.2))
+
+# Rules use groups and permissions from these pools and users get a few
+# of each, so that both allowed and denied requests are exercised(at the
+# default sizes 15-70% of requests of each scenario are denied)
+HOT_GROUPS = 100
+HOT_PERMISSIONS = 20
+HOT_SHARE = 0.05
+# Permissions of a rule are fewer than its groups, a user has only a
+# couple of hot permissions but many groups
+PERMISSIONS_WIDTH_SHARE = 0.25
+
+# Filled by `build_viewsets`, the scenario runs with this module as URLconf
+urlpatterns = []
+
+
+def seed(rng, group_count, user_count, groups_per_user):
+    """
+    Create groups and users, each user belongs to `groups_per_user`
+    random groups and has some random permissions.
+    """
+    Group.objects.bulk_create(
+        [Group(name='group%s' % index) for index in range(group_count)]
+    )
+    group_ids = list(Group.objects.order_by('pk').values_list('pk', flat=True))
+    User.objects.bulk_create(
+        [User(username='user%s' % index) for index in range(user_count)]
+    )
+    users = list(User.objects.order_by('pk'))
+
+    hot_groups = group_ids[:HOT_GROUPS]
+    memberships = []
+    for user in users:
+        user_groups = set(rng.sample(
+            hot_groups, min(groups_per_user, int(len(hot_groups) * HOT_SHARE))
+        ))
+        others = rng.sample(group_ids, min(groups_per_user, len(group_ids)))
+        for group_id in others[:groups_per_user - len(user_groups)]:
+            user_groups.add(group_id)
+        memberships.extend(
+            User.groups.through(user_id=user.pk, group_id=group_id)
+            for group_id in user_groups
+        )
+    User.groups.through.objects.bulk_create(memberships)
+
+    permission_ids = list(Permission.objects.order_by('pk').values_list('pk', flat=True))
+    hot_permissions = permission_ids[:HOT_PERMISSIONS]
+    grants = []
+    for user in users:
+        for permission_id in rng.sample(hot_permissions, int(len(hot_permissions) * HOT_SHARE) + 1):
+            grants.append(User.user_permissions.through(
+                user_id=user.pk, permission_id=permission_id
+            ))
+    User.user_permissions.through.objects.bulk_create(grants)
+    return users
+
+
+def make_expression(rng, names, width, depth):
+    """
+    Build `Or` of `width` names sampled from `names`, when `depth` is more
+    than 1 the last operand is `And` of a name and a nested expression.
+    Operands are never negated, so a user passes only if they have some
+    of the names.
+    """
+    operands = rng.sample(names, min(width, len(names)))
+    expression = []
+    for name in operands[:-1]:
+        expression.extend([name, Or])
+    if depth > 1:
+        expression.append([operands[-1], And, make_expression(rng, names, width, depth - 1)])
+    else:
+        expression.append(operands[-1])
+    return expression
+
+
+def make_access_rules(rng, group_names, permission_names, width, depth):
+    def groups():
+        return make_expression(rng, group_names, width, depth)
+
+    def permissions():
+        permissions_width = max(1, int(width * PERMISSIONS_WIDTH_SHARE))
+        return make_expression(rng, permission_names, permissions_width, depth)
+
+    return {
+        'GET': {
+            'list': {
+                'groups': groups(),
+                'permissions': [IsAuthenticated, And, permissions()],
+                'expression': ['groups', Or, 'permissions']
+            },
+            'retrieve': {
+                'groups': groups(),
+                'permissions': [IsAuthenticated, And, [IsSelfUser, Or, permissions()]],
+                'expression': ['groups', Or, 'permissions']
+            }
+        },
+        'PATCH': {
+            'groups': groups(),
+            'permissions': [IsAuthenticated, And, [IsSelfUser, Or, permissions()]],
+            'expression': ['groups', And, 'permissions']
+        }
+    }
+
+
+def build_viewsets(rng, viewset_count, width, depth):
+    """
+    Register `viewset_count` viewsets for each permission class, every
+    viewset gets its own access rules.
+    """
+    group_names = list(Group.objects.order_by('pk').values_list('name', flat=True)[:HOT_GROUPS])
+    permission_names = [
+        '%s.%s' % (app_label, codename)
+        for app_label, codename in
+        Permission.objects.order_by('pk').values_list(
+            'content_type__app_label', 'codename'
+        )[:HOT_PERMISSIONS]
+    ]
+    router = routers.SimpleRouter()
+    prefixes = []
+    for permission_class in PERMISSION_CLASSES:
+        for index in range(viewset_count):
+            prefix = '%s-%s' % (permission_class.__name__.lower(), index)
+            viewset = type('LoadViewSet%s' % len(prefixes), (viewsets.ModelViewSet,), {
+                'queryset': User.objects.order_by('pk'),
+                'serializer_class': UserSerializer,
+                'permission_classes': (permission_class,),
+                'http_method_names': ['get', 'patch'],
+                'access_rules': make_access_rules(
+                    rng, group_names, permission_names, width, depth
+                )
+            })
+            router.register(prefix, viewset, prefix)
+            prefixes.append((permission_class, prefix))
+    urlpatterns[:] = [url('', include(router.urls))]
+    return prefixes
+
+
+def choose_action(rng):
+    value = rng.random() * sum(share for action, share in TRAFFIC)
+    for action, share in TRAFFIC:
+        value -= share
+        if value < 0:
+            return action
+    return TRAFFIC[-1][0]
+
+
+def make_traffic(rng, users, prefixes, count):
+    traffic = []
+    for _ in range(count):
+        permission_class, prefix = rng.choice(prefixes)
+        action = choose_action(rng)
+        user = rng.choice(users)
+        target = user if rng.random() < 0.2 else rng.choice(users)
+        traffic.append((permission_class, prefix, action, user, target))
+    return traffic
+
+
+def send(client, prefix, action, target):
+    if action == 'list':
+        return client.get('/%s/' % prefix)
+    if action == 'retrieve':
+        return client.get('/%s/%s/' % (prefix, target.pk))
+    return client.patch('/%s/%s/' % (prefix, target.pk), {'username': target.username})
+
+
+def run(traffic):
+    """
+    Send the traffic, return per (permission class, action) timings,
+    query counts and status codes.
+    """
+    results = collections.defaultdict(lambda: {'timings': [], 'queries': [], 'statuses': []})
+    client = APIClient()
+    for permission_class, prefix, action, user, target in traffic:
+        client.force_authenticate(fresh_user(user))
+        # Seeding fills the query log, once it's full new queries aren't counted
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = send(client, prefix, action, target)
+            elapsed = time.perf_counter() - start
+        result = results[(permission_class.__name__, action)]
+        result['timings'].append(elapsed)
+        result['queries'].append(len(queries))
+        result['statuses'].append(response.status_code)
+    return results
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def print_results(results):
+    header = '%-40s %8s %10s %10s %10s %10s %9s' % (
+        'scenario', 'requests', 'req/s', 'p50(ms)', 'p99(ms)', 'queries', 'allowed'
+    )
+    print(header)
+    print('-' * len(header))
+    for (name, action), result in sorted(results.items()):
+        timings = sorted(result['timings'])
+        statuses = result['statuses']
+        print('%-40s %8d %10.1f %10.2f %10.2f %10.1f %8.0f%%' % (
+            '%s %s' % (name, action), len(timings), len(timings) / sum(timings),
+            percentile(timings, 0.5) * 1e3, percentile(timings, 0.99) * 1e3,
+            sum(result['queries']) / len(timings),
+            100.0 * sum(status < 400 for status in statuses) / len(statuses)
+        ))
+
+    for (name, action), result in sorted(results.items()):
+        if all(status < 400 for status in result['statuses']):
+            print('\nWarning: no request of %s %s was denied, the deny path '
+                  'is not measured.' % (name, action))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--groups', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--groups-per-user', type=int, default=200)
+    parser.add_argument('--viewsets', type=int, default=20, help="Viewsets per permission class")
+    parser.add_argument('--width', type=int, default=16)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--quick', action='store_true', help="Run a small scenario")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.groups, args.users, args.groups_per_user = 200, 10, 20
+        args.viewsets, args.width, args.depth, args.requests = 3, 4, 2, 300
+
+    # Denied requests are expected, don't log each of them
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    rng = random.Random(args.seed)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        users = seed(rng, args.groups, args.users, args.groups_per_user)
+        prefixes = build_viewsets(rng, args.viewsets, args.width, args.depth)
+        traffic = make_traffic(rng, users, prefixes, args.requests)
+        with override_settings(ROOT_URLCONF=__name__):
+            start = time.perf_counter()
+            results = run(traffic)
+            elapsed = time.perf_counter() - start
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print('%s groups, %s users in %s groups each, %s viewsets, %s requests in %.1fs (%.1f req/s)\n' % (
+        args.groups, args.users, args.groups_per_user, args.viewsets * len(PERMISSION_CLASSES),
+        args.requests, elapsed, args.requests / elapsed
+    ))
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
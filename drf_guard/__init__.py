@@ -1,3 +1,5 @@
+import django
+
 __title__ = 'DRF Guard'
 __description__ = 'Flexible permissions for Django REST Framework'
 __url__ = 'https://github.com/yezyilomo/drf-guard'
@@ -9,3 +11,6 @@ __copyright__ = 'Copyright 2020 Yezy Ilomo'
 
 # Version synonym
 VERSION = __version__
+
+if django.VERSION < (3, 2):
+    default_app_config = 'drf_guard.apps.DRFGuardConfig'
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class DRFGuardConfig(AppConfig):
+    name = 'drf_guard'
+    verbose_name = 'DRF Guard'
+
+    def ready(self):
+        from . import checks  # noqa
+        from .cache import connect_signals
+        from .settings import get_setting
+        connect_signals()
+
+        if get_setting('PRECOMPILE_ACCESS_RULES'):
+            # Compiled plans are shared by pre-forked workers
+            checks.precompile_access_rules()
@@ -0,0 +1,116 @@
+import uuid
+
+from django.core.cache import caches
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .groups import group_index
+from .settings import get_setting
+
+
+VERSION_KEY = 'drf_guard:groups:version'
+USER_VERSION_KEY = 'drf_guard:groups:version:%s'
+GROUPS_KEY = 'drf_guard:groups:v3:%s'
+
+
+def get_membership_cache():
+    alias = get_setting('MEMBERSHIP_CACHE')
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def get_version(cache, key=VERSION_KEY):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def get_cached_groups(cache, user_pk):
+    """
+    Return `(version, groups)` of a user, `groups` are `(id, name)` pairs
+    of user's groups or `None` if the cache has no valid entry for the user.
+
+    `version` combines the global and the user's version stamps, entries
+    written with an older stamp(e.g by a request which fetched groups
+    before they changed) are ignored.
+    """
+    key = GROUPS_KEY % user_pk
+    user_version_key = USER_VERSION_KEY % user_pk
+    cached = cache.get_many([key, VERSION_KEY, user_version_key])
+    version = (
+        cached.get(VERSION_KEY) or get_version(cache),
+        cached.get(user_version_key) or get_version(cache, user_version_key)
+    )
+
+    entry = cached.get(key)
+    if entry is None or entry[0] != version:
+        # Entry is missing or it was created before the last invalidation
+        return version, None
+    return entry
+
+
+def set_cached_groups(cache, user_pk, version, groups):
+    timeout = get_setting('MEMBERSHIP_CACHE_TIMEOUT')
+    cache.set(GROUPS_KEY % user_pk, (version, groups), timeout)
+
+
+def invalidate_users(user_pks):
+    cache = get_membership_cache()
+    if cache is not None:
+        # Entries with old version stamps of the users become invalid,
+        # even those written after they are deleted
+        cache.set_many({USER_VERSION_KEY % pk: uuid.uuid4().hex for pk in user_pks}, None)
+        cache.delete_many([GROUPS_KEY % pk for pk in user_pks])
+
+
+def invalidate_all():
+    cache = get_membership_cache()
+    if cache is not None:
+        # All entries with the old version stamp become invalid
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_users([instance.pk])
+    elif pk_set:
+        # Users were added to or removed from a group
+        invalidate_users(pk_set)
+    else:
+        # A group was cleared, we don't know which users were in it
+        invalidate_all()
+
+
+def group_saved(sender, instance, created, **kwargs):
+    group_index.update([(instance.pk, instance.name)])
+    if not created:
+        # The group might have been renamed
+        invalidate_all()
+
+
+def group_deleted(sender, instance, **kwargs):
+    group_index.discard(instance.pk)
+    invalidate_all()
+
+
+def connect_signals():
+    groups = getattr(get_user_model(), 'groups', None)
+    if groups is not None:
+        m2m_changed.connect(
+            user_groups_changed, sender=groups.through,
+            dispatch_uid='drf_guard_user_groups_changed'
+        )
+    post_save.connect(
+        group_saved, sender=Group,
+        dispatch_uid='drf_guard_group_saved'
+    )
+    post_delete.connect(
+        group_deleted, sender=Group,
+        dispatch_uid='drf_guard_group_deleted'
+    )
@@ -0,0 +1,298 @@
+from django.contrib.auth.models import Group, Permission
+from django.core.exceptions import ImproperlyConfigured
+from django.core.checks import Error, Tags, Warning, register
+from django.db import router
+from django.urls import get_resolver
+
+from .compiler import AccessPlan, DEFAULT_KEY, GROUP, PERMISSION_NAME, compile_view
+from .filters import AccessRulesFilter
+from .rules_file import get_rules_file, get_view_path
+
+
+HTTP_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS', 'TRACE')
+RULE_KEYS = ('groups', 'permissions', 'expression', 'reorder')
+ACTIONS = ('list', 'retrieve')
+VIEWSET_ACTIONS = ('list', 'retrieve', 'create', 'update', 'partial_update', 'destroy')
+
+
+def get_views(patterns=None):
+    """
+    Return classes of all views registered in the URLconf.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+
+    views = []
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            # It's an include
+            views.extend(get_views(pattern.url_patterns))
+            continue
+        callback = getattr(pattern, 'callback', None)
+        view = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+        if view is not None and view not in views:
+            views.append(view)
+    return views
+
+
+def get_file_rules():
+    """
+    Return access rules from access rules file keyed by view path.
+    """
+    rules_file = get_rules_file()
+    if rules_file is None:
+        return {}
+    return {path: plan.access_rules for path, plan in rules_file.plans.items()}
+
+
+def get_guarded_views():
+    file_rules = get_file_rules()
+    return [
+        view for view in get_views()
+        if hasattr(view, 'access_rules') or get_view_path(view) in file_rules
+    ]
+
+
+def get_access_rules(view, file_rules):
+    return file_rules.get(get_view_path(view), getattr(view, 'access_rules', None))
+
+
+def get_view_actions(view):
+    """
+    Return names of actions of a viewset, views which aren't viewsets
+    don't have actions.
+    """
+    if not hasattr(view, 'get_extra_actions'):
+        return set()
+    actions = {action for action in VIEWSET_ACTIONS if hasattr(view, action)}
+    actions.update(action.__name__ for action in view.get_extra_actions())
+    return actions
+
+
+def has_permission_objects(rules):
+    """
+    Check if access rules contain Django `Permission` objects, their
+    names are resolved through content types which need the database.
+    """
+    if isinstance(rules, Permission):
+        return True
+    if isinstance(rules, dict):
+        rules = rules.values()
+    elif not isinstance(rules, (list, tuple)):
+        return False
+    return any(has_permission_objects(value) for value in rules)
+
+
+def without_permission_objects(rules):
+    """
+    Return a copy of access rules whose Django `Permission` objects are
+    replaced by placeholder names, so that they compile without the
+    database.
+    """
+    if isinstance(rules, Permission):
+        return '%s.%s' % (rules.content_type_id, rules.codename)
+    if isinstance(rules, dict):
+        return {key: without_permission_objects(value) for key, value in rules.items()}
+    if isinstance(rules, (list, tuple)):
+        return type(rules)(without_permission_objects(value) for value in rules)
+    return rules
+
+
+def check_rules_keys(view, keys, name):
+    return [
+        Warning(
+            "`%s` in access rules of %s is never used." % (key, name),
+            hint="Allowed keys are %s." % ', '.join(RULE_KEYS + ACTIONS),
+            obj=view, id='drf_guard.W002'
+        )
+        for key in keys if key not in RULE_KEYS
+    ]
+
+
+def check_rules_structure(view, access_rules):
+    errors = []
+    if not isinstance(access_rules, dict):
+        msg = "`access_rules` must be a dict, not `%s`." % type(access_rules).__name__
+        return [Error(msg, obj=view, id='drf_guard.E001')]
+
+    actions = get_view_actions(view)
+    for key, rules in access_rules.items():
+        is_method = key == DEFAULT_KEY or key.isupper()
+        if is_method and key != DEFAULT_KEY and key not in HTTP_METHODS:
+            errors.append(Warning(
+                "`%s` is not an HTTP method, its access rules are never used." % key,
+                obj=view, id='drf_guard.W001'
+            ))
+        elif not is_method and key not in actions:
+            errors.append(Warning(
+                "`%s` is neither an HTTP method nor an action of the view, "
+                "its access rules are never used." % key,
+                hint="HTTP methods in `access_rules` must be in uppercase.",
+                obj=view, id='drf_guard.W001'
+            ))
+
+        kind = 'method' if is_method else 'action'
+        if not isinstance(rules, dict):
+            msg = "Access rules of `%s` %s must be a dict." % (key, kind)
+            errors.append(Error(msg, obj=view, id='drf_guard.E001'))
+            continue
+
+        if not is_method:
+            errors.extend(check_rules_keys(view, rules, "`%s` action" % key))
+            continue
+
+        keys = []
+        for action, action_rules in rules.items():
+            if isinstance(action_rules, dict):
+                # Rules of an action of this method
+                name = "`%s` `%s`" % (key, action)
+                errors.extend(check_rules_keys(view, action_rules, name))
+            elif action in ACTIONS:
+                msg = "Access rules of `%s` `%s` must be a dict." % (key, action)
+                errors.append(Error(msg, obj=view, id='drf_guard.E001'))
+            else:
+                keys.append(action)
+        errors.extend(check_rules_keys(view, keys, "`%s` method" % key))
+    return errors
+
+
+@register('drf_guard')
+def check_access_rules(app_configs=None, **kwargs):
+    """
+    Validate `access_rules` of all views and compile them.
+    """
+    try:
+        file_rules = get_file_rules()
+    except ImproperlyConfigured as e:
+        return [Error(str(e), id='drf_guard.E003')]
+
+    errors = []
+    views = get_guarded_views()
+    paths = {get_view_path(view) for view in views}
+    for path in file_rules:
+        if path not in paths:
+            errors.append(Warning(
+                "Access rules file has rules for `%s` which isn't a view "
+                "in the URLconf." % path, id='drf_guard.W004'
+            ))
+
+    for view in views:
+        access_rules = get_access_rules(view, file_rules)
+        structure_errors = check_rules_structure(view, access_rules)
+        errors.extend(structure_errors)
+        if any(isinstance(error, Error) for error in structure_errors):
+            continue
+        try:
+            if has_permission_objects(access_rules):
+                # Only validated, they are compiled on the first request
+                # since the database may not be ready(e.g before migrations)
+                plan = AccessPlan(without_permission_objects(access_rules))
+            else:
+                plan = compile_view(view)
+        except TypeError as e:
+            errors.append(Error(str(e), obj=view, id='drf_guard.E002'))
+            continue
+        errors.extend(check_filter_backends(view, plan))
+        errors.extend(check_permission_names(view, plan))
+    return errors
+
+
+def check_permission_names(view, plan):
+    """
+    Check that permission names are full names(`app_label.codename`),
+    `has_perm` of Django's backends doesn't match codenames alone.
+    """
+    names = []
+    for rule in plan.rules.values():
+        for operand in rule.permissions.operands():
+            name = operand.value
+            if operand.kind == PERMISSION_NAME and '.' not in name and name not in names:
+                names.append(name)
+    return [
+        Warning(
+            "`%s` is not a full permission name, it's never granted by "
+            "Django's authentication backends." % name,
+            hint="Use `app_label.codename`.", obj=view, id='drf_guard.W005'
+        )
+        for name in names
+    ]
+
+
+def check_filter_backends(view, plan):
+    """
+    Check that object level rules used by `AccessRulesFilter` backends
+    of a view can be converted into filters.
+    """
+    errors = []
+    for backend in getattr(view, 'filter_backends', ()):
+        if not (isinstance(backend, type) and issubclass(backend, AccessRulesFilter)):
+            continue
+        for permission in backend().get_unfilterable_permissions(plan):
+            errors.append(Error(
+                "`%s` must implement `object_permission_filter()` to be used "
+                "with `%s`." % (permission.__name__, backend.__name__),
+                obj=view, id='drf_guard.E004'
+            ))
+    return errors
+
+
+@register(Tags.database)
+def check_group_names(app_configs=None, **kwargs):
+    """
+    Check that groups named in `access_rules` exist in the database.
+    """
+    database = router.db_for_read(Group)
+    if 'databases' in kwargs and database not in (kwargs['databases'] or []):
+        # Database checks weren't requested for this database(Django < 3.1
+        # runs database checks only when they are requested)
+        return []
+
+    try:
+        views = get_guarded_views()
+    except ImproperlyConfigured:
+        # Reported by `check_access_rules`
+        return []
+
+    group_names = {}
+    for view in views:
+        try:
+            plan = compile_view(view)
+        except (TypeError, AttributeError):
+            # Reported by `check_access_rules`
+            continue
+        for rule in plan.rules.values():
+            for operand in rule.groups.operands():
+                if operand.kind == GROUP and isinstance(operand.value, str):
+                    group_names.setdefault(operand.value, view)
+
+    existing_names = set(
+        Group.objects.using(database).filter(name__in=group_names)
+        .values_list('name', flat=True)
+    )
+    return [
+        Warning(
+            "Group `%s` does not exist." % name, obj=view, id='drf_guard.W003'
+        )
+        for name, view in group_names.items()
+        if name not in existing_names
+    ]
+
+
+def precompile_access_rules():
+    """
+    Compile `access_rules` of all views, errors are left to be reported
+    by system checks.
+    """
+    try:
+        file_rules = get_file_rules()
+        views = get_guarded_views()
+    except ImproperlyConfigured:
+        return
+    for view in views:
+        if has_permission_objects(get_access_rules(view, file_rules)):
+            # Database isn't accessed while apps are initialized
+            continue
+        try:
+            compile_view(view)
+        except (TypeError, AttributeError):
+            pass
@@ -0,0 +1,977 @@
+import asyncio
+import hashlib
+import itertools
+
+from rest_framework import permissions
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+
+from .operators import And, Not, Operator, Or
+from .roles import ObjectRole
+from .settings import get_setting
+
+
+ANY = '__any__'
+
+# Operand kinds
+GROUP = 'group'
+OBJECT_ROLE = 'object_role'
+PERMISSION_NAME = 'permission_name'
+PERMISSION_CLASS = 'permission_class'
+NAME = 'name'
+
+EXPRESSION_OPERANDS = ('groups', 'permissions')
+DEFAULT_EXPRESSION = ['groups', 'permissions']
+# Key of `access_rules` for HTTP methods without rules
+DEFAULT_KEY = 'default'
+
+
+def quote(name):
+    """
+    Quote operand name if it can't be written as a single word in a
+    string expression.
+    """
+    if name.lower() in ('and', 'or', 'not') or any(c in name for c in ' \t\n()\'"'):
+        if "'" in name:
+            return '"%s"' % name
+        return "'%s'" % name
+    return name
+
+
+class Expr():
+    """
+    Base class for compiled(immutable) access rule expressions.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("`%s` is immutable." % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("`%s` is immutable." % type(self).__name__)
+
+    def key(self):
+        """
+        Return a value identifying the structure of the expression,
+        structurally equal expressions are equal.
+        """
+        raise NotImplementedError()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash((type(self), self.key()))
+
+    def evaluate(self, resolve):
+        raise NotImplementedError()
+
+    async def aevaluate(self, resolve):
+        """
+        Evaluate the expression with `resolve(operand)` coroutine function.
+        """
+        raise NotImplementedError()
+
+    def evaluate_batch(self, items, resolve):
+        """
+        Evaluate the expression for each item, `resolve(operand, items)`
+        returns values of an operand for a list of items and it's only
+        called with items whose result isn't known yet.
+        """
+        raise NotImplementedError()
+
+    def partial(self, resolve):
+        """
+        Partially evaluate the expression, `resolve(operand)` returns
+        `None` for operands whose values aren't known yet and the
+        remaining expression is returned.
+        """
+        raise NotImplementedError()
+
+    def operands(self):
+        """
+        Yield all operands(leaves) of this expression from left to right.
+        """
+        return iter(())
+
+
+class Constant(Expr):
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        object.__setattr__(self, 'value', bool(value))
+
+    def key(self):
+        return self.value
+
+    def __str__(self):
+        return str(self.value)
+
+    def evaluate(self, resolve):
+        return self.value
+
+    async def aevaluate(self, resolve):
+        return self.value
+
+    def evaluate_batch(self, items, resolve):
+        return [self.value] * len(items)
+
+    def partial(self, resolve):
+        return self
+
+    def __repr__(self):
+        return 'Constant(%r)' % self.value
+
+
+class Operand(Expr):
+    __slots__ = ('value', 'kind')
+
+    def __init__(self, value, kind):
+        object.__setattr__(self, 'value', value)
+        object.__setattr__(self, 'kind', kind)
+
+    def key(self):
+        if not getattr(self.value, 'drf_guard_memoize', True):
+            # Results may differ between calls, so it's never a duplicate
+            return (self.kind, self.value, id(self))
+        return (self.kind, self.value)
+
+    def __str__(self):
+        value = self.value
+        if self.kind == PERMISSION_CLASS:
+            if value.__module__ == permissions.__name__:
+                name = value.__name__
+            else:
+                name = '%s.%s' % (value.__module__, value.__qualname__)
+        elif isinstance(value, Group):
+            name = value.name
+        else:
+            name = str(value)
+        return quote(name)
+
+    def evaluate(self, resolve):
+        return bool(resolve(self))
+
+    async def aevaluate(self, resolve):
+        return bool(await resolve(self))
+
+    def evaluate_batch(self, items, resolve):
+        return [bool(value) for value in resolve(self, items)]
+
+    def partial(self, resolve):
+        value = resolve(self)
+        if value is None:
+            return self
+        return Constant(value)
+
+    def operands(self):
+        yield self
+
+    def __repr__(self):
+        return 'Operand(%r, %r)' % (self.value, self.kind)
+
+
+class NotExpr(Expr):
+    __slots__ = ('child',)
+
+    def __init__(self, child):
+        object.__setattr__(self, 'child', child)
+
+    def key(self):
+        return self.child
+
+    def __str__(self):
+        if isinstance(self.child, BoolExpr):
+            return 'not (%s)' % self.child
+        return 'not %s' % self.child
+
+    def evaluate(self, resolve):
+        return not self.child.evaluate(resolve)
+
+    async def aevaluate(self, resolve):
+        return not await self.child.aevaluate(resolve)
+
+    def evaluate_batch(self, items, resolve):
+        return [not value for value in self.child.evaluate_batch(items, resolve)]
+
+    def partial(self, resolve):
+        child = self.child.partial(resolve)
+        if isinstance(child, Constant):
+            return Constant(not child.value)
+        if child is self.child:
+            return self
+        return NotExpr(child)
+
+    def operands(self):
+        return self.child.operands()
+
+    def __repr__(self):
+        return 'NotExpr(%r)' % (self.child,)
+
+
+class BoolExpr(Expr):
+    __slots__ = ('children',)
+    # Value of a child which determines the value of the whole expression
+    shortcircuit = None
+
+    def __init__(self, children):
+        flattened = []
+        for child in children:
+            if type(child) is type(self):
+                # (a and b) and c is the same as a and b and c
+                flattened.extend(child.children)
+            else:
+                flattened.append(child)
+        object.__setattr__(self, 'children', tuple(flattened))
+
+    def key(self):
+        return self.children
+
+    def __str__(self):
+        parts = []
+        for child in self.children:
+            if isinstance(child, OrExpr) and isinstance(self, AndExpr):
+                parts.append('(%s)' % child)
+            else:
+                parts.append(str(child))
+        return (' %s ' % self.keyword).join(parts)
+
+    def evaluate_batch(self, items, resolve):
+        results = [not self.shortcircuit] * len(items)
+        pending = list(range(len(items)))
+        for child in self.children:
+            if not pending:
+                break
+            values = child.evaluate_batch([items[i] for i in pending], resolve)
+            undecided = []
+            for index, value in zip(pending, values):
+                if value is self.shortcircuit:
+                    results[index] = value
+                else:
+                    undecided.append(index)
+            pending = undecided
+        return results
+
+    def partial(self, resolve):
+        children = []
+        for child in self.children:
+            child = child.partial(resolve)
+            if isinstance(child, Constant):
+                if child.value is self.shortcircuit:
+                    # Shortcircuit
+                    return child
+                continue
+            children.append(child)
+
+        if not children:
+            return Constant(not self.shortcircuit)
+        if len(children) == 1:
+            return children[0]
+        if len(children) == len(self.children) and all(
+                new is old for new, old in zip(children, self.children)):
+            return self
+        return type(self)(children)
+
+    def operands(self):
+        for child in self.children:
+            yield from child.operands()
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.children)
+
+
+class AndExpr(BoolExpr):
+    __slots__ = ()
+    shortcircuit = False
+    keyword = 'and'
+
+    def evaluate(self, resolve):
+        for child in self.children:
+            if not child.evaluate(resolve):
+                # Shortcircuit
+                return False
+        return True
+
+    async def aevaluate(self, resolve):
+        """
+        Evaluate children in order like `evaluate`, so that children
+        guarding the rest(e.g `IsAuthenticated`) are checked first.
+        """
+        for child in self.children:
+            if not await child.aevaluate(resolve):
+                # Shortcircuit
+                return False
+        return True
+
+
+class OrExpr(BoolExpr):
+    __slots__ = ()
+    shortcircuit = True
+    keyword = 'or'
+
+    def evaluate(self, resolve):
+        for child in self.children:
+            if child.evaluate(resolve):
+                # Shortcircuit
+                return True
+        return False
+
+    async def aevaluate(self, resolve):
+        """
+        Evaluate children concurrently, the first child which passes
+        decides the result and the rest are cancelled. Errors of children
+        are raised only if no child passes.
+        """
+        tasks = [
+            asyncio.ensure_future(child.aevaluate(resolve))
+            for child in self.children
+        ]
+        error = None
+        try:
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                    elif task.result():
+                        # Shortcircuit
+                        return True
+            if error is not None:
+                raise error
+            return False
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def is_operator(value, operator=Operator):
+    return isinstance(value, type) and issubclass(value, operator)
+
+
+def all_of(nodes):
+    if len(nodes) == 1:
+        return nodes[0]
+    return AndExpr(nodes)
+
+
+def compile_expression(expr, make_operand, parse_operand=None):
+    """
+    Compile a list of operands and operators into an expression tree.
+
+    Operators have no precedence, an operand followed by `And`/`Or`
+    applies to everything on its right(this is how `Reducer` evaluates
+    a sequence), while operands separated by a comma are joined with
+    an implicit `And` which binds tighter than `And`/`Or`.
+
+    A string is parsed as an expression with `and`, `or`, `not` and
+    parentheses, `parse_operand` makes operands from its words.
+    """
+    if isinstance(expr, str) and expr == ANY:
+        return Constant(True)
+    if not expr:
+        # If there are no operands to check
+        return Constant(False)
+    if isinstance(expr, str):
+        from .parser import parse_expression
+        return parse_expression(expr, parse_operand or make_operand)
+    if not isinstance(expr, (list, tuple)):
+        return make_operand(expr)
+
+    terms = []
+    operators = []
+    current_term = []
+    negations = 0
+    for item in expr:
+        if is_operator(item, Not):
+            negations = negations + 1
+            continue
+
+        if is_operator(item, (And, Or)):
+            if negations or not current_term:
+                msg = "`%s` operator is missing its left operand." % item.__name__
+                raise TypeError(msg)
+            terms.append(all_of(current_term))
+            operators.append(item)
+            current_term = []
+            continue
+
+        if isinstance(item, (list, tuple)):
+            if not item:
+                raise TypeError("Empty sub expressions are not allowed.")
+            node = compile_expression(item, make_operand, parse_operand)
+        else:
+            node = make_operand(item)
+
+        for _ in range(negations):
+            node = NotExpr(node)
+        negations = 0
+        current_term.append(node)
+
+    if negations or not current_term:
+        raise TypeError("Access rule expression ends with an operator.")
+    terms.append(all_of(current_term))
+
+    node = terms.pop()
+    while terms:
+        left_operand = terms.pop()
+        operator = operators.pop()
+        if issubclass(operator, And):
+            node = AndExpr((left_operand, node))
+        else:
+            node = OrExpr((left_operand, node))
+    return node
+
+
+def make_group_operand(group):
+    if isinstance(group, (str, Group)):
+        return Operand(group, GROUP)
+    if isinstance(group, int) and not isinstance(group, bool):
+        # Primary key of a group
+        return Operand(group, GROUP)
+    if isinstance(group, ObjectRole):
+        return Operand(group, OBJECT_ROLE)
+    data_type = type(group).__name__
+    raise TypeError("`%s` is an invalid group type." % data_type)
+
+
+def get_permission_name(permission):
+    """
+    Return `app_label.codename` of Django permission, the format
+    expected by `user.has_perm`.
+    """
+    content_type = ContentType.objects.get_for_id(permission.content_type_id)
+    return '%s.%s' % (content_type.app_label, permission.codename)
+
+
+def make_permission_operand(permission):
+    if isinstance(permission, str):
+        return Operand(permission, PERMISSION_NAME)
+    if isinstance(permission, Permission):
+        return Operand(get_permission_name(permission), PERMISSION_NAME)
+    if is_operator(permission, permissions.BasePermission):
+        return Operand(permission, PERMISSION_CLASS)
+    data_type = type(permission).__name__
+    raise TypeError("`%s` is an invalid permission type." % data_type)
+
+
+def parse_permission_operand(name):
+    from .parser import resolve_permission_class
+    permission = resolve_permission_class(name)
+    if permission is not None:
+        return Operand(permission, PERMISSION_CLASS)
+    return Operand(name, PERMISSION_NAME)
+
+
+def make_name_operand(operand):
+    if isinstance(operand, str) and operand in EXPRESSION_OPERANDS:
+        return Operand(operand, NAME)
+
+    if isinstance(operand, str):
+        invalid_operand = operand
+    else:
+        invalid_operand = type(operand).__name__
+    operands = ['`%s`' % op for op in EXPRESSION_OPERANDS]
+    allowed_operands = ', '.join(operands)
+    msg = (
+        "`%s` is an invalid operand, allowed operands are %s."
+    ) % (invalid_operand, allowed_operands)
+    raise TypeError(msg)
+
+
+def compile_groups(groups):
+    return compile_expression(groups, make_group_operand)
+
+
+def compile_permissions(permissions):
+    return compile_expression(
+        permissions, make_permission_operand, parse_permission_operand
+    )
+
+
+def compile_groups_and_perms_expr(groups_and_perms_expr):
+    return compile_expression(groups_and_perms_expr, make_name_operand)
+
+
+def optimize(expression):
+    """
+    Simplify an expression without changing its truth value, constants
+    are folded, duplicate operands removed and boolean identities like
+    double negation, absorption and complement applied.
+    """
+    if isinstance(expression, Operand):
+        if expression.kind == PERMISSION_CLASS and expression.value is permissions.AllowAny:
+            return Constant(True)
+        return expression
+
+    if isinstance(expression, NotExpr):
+        child = optimize(expression.child)
+        if isinstance(child, Constant):
+            return Constant(not child.value)
+        if isinstance(child, NotExpr):
+            # not not a = a
+            return child.child
+        return NotExpr(child)
+
+    if not isinstance(expression, BoolExpr):
+        return expression
+
+    children = []
+    for child in expression.children:
+        child = optimize(child)
+        if isinstance(child, Constant):
+            if child.value is expression.shortcircuit:
+                # a or True = True, a and False = False
+                return child
+            continue
+        nested = child.children if type(child) is type(expression) else (child,)
+        for item in nested:
+            if item not in children:
+                # a and a = a
+                children.append(item)
+
+    for child in children:
+        if NotExpr(child) in children:
+            # a and not a = False, a or not a = True
+            return Constant(expression.shortcircuit)
+
+    # a and (a or b) = a, a or (a and b) = a
+    children = [
+        child for child in children
+        if not (
+            isinstance(child, BoolExpr) and type(child) is not type(expression) and
+            any(other in child.children for other in children if other is not child)
+        )
+    ]
+
+    if not children:
+        return Constant(not expression.shortcircuit)
+    if len(children) == 1:
+        return children[0]
+    return type(expression)(children)
+
+
+def substitute(expression, expressions):
+    """
+    Replace name operands(`groups`, `permissions`) of an expression
+    with the expressions they stand for.
+    """
+    if isinstance(expression, Operand):
+        if expression.kind == NAME:
+            return expressions[expression.value]
+        return expression
+    if isinstance(expression, NotExpr):
+        return NotExpr(substitute(expression.child, expressions))
+    if isinstance(expression, BoolExpr):
+        return type(expression)([
+            substitute(child, expressions) for child in expression.children
+        ])
+    return expression
+
+
+# Relative evaluation costs, group membership is checked in memory
+# and permission names are checked against permissions cached by
+# authentication backends.
+GROUP_COST = 1
+PERMISSION_NAME_COST = 2
+# Roles of all objects being checked are fetched with a single query
+OBJECT_ROLE_COST = 10
+PERMISSION_CLASS_COSTS = {
+    # DRF permissions which check request attributes only
+    permissions.AllowAny: 0,
+    permissions.IsAuthenticated: 0,
+    permissions.IsAdminUser: 0,
+    permissions.IsAuthenticatedOrReadOnly: 0,
+}
+
+
+def get_operand_cost(operand):
+    """
+    Return cost hint of an operand, `None` if it's unknown.
+    """
+    if operand.kind == GROUP:
+        return GROUP_COST
+    if operand.kind == PERMISSION_NAME:
+        return PERMISSION_NAME_COST
+    if operand.kind == OBJECT_ROLE:
+        return OBJECT_ROLE_COST
+    if operand.kind == PERMISSION_CLASS:
+        cost = getattr(operand.value, 'drf_guard_cost', None)
+        if cost is None:
+            return PERMISSION_CLASS_COSTS.get(operand.value)
+        return cost
+    return None
+
+
+# Verdicts of DRF permission classes' `has_permission` for anonymous users
+ANONYMOUS_VERDICTS = {
+    permissions.AllowAny: True,
+    permissions.IsAuthenticated: False,
+    permissions.IsAdminUser: False,
+}
+
+
+def overrides_object_permission(permission):
+    """
+    Check if DRF permission class has object level checks, the default
+    `has_object_permission` always allows access.
+    """
+    default = permissions.BasePermission.has_object_permission
+    return permission.has_object_permission is not default
+
+
+def get_anonymous_verdict(permission, method=None):
+    """
+    Return verdict of permission class's `has_permission` for anonymous
+    users, `None` if it's unknown. Classes can declare it with
+    `drf_guard_anonymous` attribute.
+    """
+    verdict = getattr(permission, 'drf_guard_anonymous', None)
+    if verdict is not None:
+        return verdict
+    if permission is permissions.IsAuthenticatedOrReadOnly and method is not None:
+        return method in permissions.SAFE_METHODS
+    return ANONYMOUS_VERDICTS.get(permission)
+
+
+def get_role_lookups(expression):
+    """
+    Return lookups of object roles used in an expression.
+    """
+    lookups = []
+    for operand in expression.operands():
+        if operand.kind == OBJECT_ROLE and operand.value.lookup not in lookups:
+            lookups.append(operand.value.lookup)
+    return lookups
+
+
+def get_cost(expression, operand_cost=get_operand_cost):
+    """
+    Return the worst case cost of evaluating an expression, `None` if
+    the cost of any of its operands is unknown.
+    """
+    if isinstance(expression, Constant):
+        return 0
+    if isinstance(expression, Operand):
+        return operand_cost(expression)
+    if isinstance(expression, NotExpr):
+        return get_cost(expression.child, operand_cost)
+
+    total = 0
+    for child in expression.children:
+        cost = get_cost(child, operand_cost)
+        if cost is None:
+            return None
+        total = total + cost
+    return total
+
+
+def reorder(expression, operand_cost=get_operand_cost):
+    """
+    Reorder operands of `And`/`Or` so that cheap ones are evaluated first.
+
+    Reordering doesn't change the truth value but it changes which
+    operands are evaluated, so operands whose cost is unknown stay in
+    place and operands are never moved across them, this keeps guards
+    like `IsAuthenticated` in `[IsAuthenticated, And, IsOwner]` first.
+    """
+    if isinstance(expression, NotExpr):
+        child = reorder(expression.child, operand_cost)
+        return expression if child is expression.child else NotExpr(child)
+    if not isinstance(expression, BoolExpr):
+        return expression
+
+    children = []
+    segment = []
+    for child in expression.children:
+        child = reorder(child, operand_cost)
+        cost = get_cost(child, operand_cost)
+        if cost is None:
+            # Operands can't be moved across this one
+            children.extend(sorted(segment, key=lambda item: item[0]))
+            children.append((None, child))
+            segment = []
+        else:
+            segment.append((cost, child))
+    children.extend(sorted(segment, key=lambda item: item[0]))
+    return type(expression)([child for cost, child in children])
+
+
+PHASES = ('has_permission', 'has_object_permission')
+
+
+def get_verdicts(rule, method=None, action=None, anonymous=False):
+    """
+    Partially evaluate a rule ahead of requests, return verdicts of its
+    `groups`, `permissions` and `expression` keyed by `(operand, phase)`,
+    those which depend on the user or the request are left out.
+
+    Anonymous users belong to no groups, their permission names are left
+    to backends, `method` and `action` are `None` if the rule is shared by
+    many of them.
+    """
+    verdicts = {}
+    for phase in PHASES:
+        object_phase = phase == 'has_object_permission'
+
+        def resolve(operand):
+            if operand.kind == GROUP:
+                return False if anonymous else None
+            if operand.kind == PERMISSION_CLASS:
+                if object_phase:
+                    # The default `has_object_permission` always allows access
+                    return None if overrides_object_permission(operand.value) else True
+                if anonymous:
+                    return get_anonymous_verdict(operand.value, method)
+            # Object roles are checked with objects
+            return None
+
+        if action == ('list' if object_phase else 'retrieve'):
+            # Groups are skipped in this phase
+            groups = Constant(True)
+        else:
+            groups = rule.groups.partial(resolve)
+            if not object_phase and not isinstance(groups, Constant) and all(
+                    operand.kind == OBJECT_ROLE for operand in groups.operands()):
+                # Groups which depend on objects pass until they are
+                # checked with objects
+                groups = Constant(True)
+        values = {
+            'groups': groups,
+            'permissions': rule.permissions.partial(resolve)
+        }
+
+        def resolve_name(operand):
+            value = values[operand.value]
+            return value.value if isinstance(value, Constant) else None
+        values['expression'] = rule.expression.partial(resolve_name)
+
+        for operand, value in values.items():
+            if isinstance(value, Constant):
+                verdicts[(operand, phase)] = value.value
+    return verdicts
+
+
+class Rule():
+    """
+    Compiled groups, permissions and expression of a single endpoint.
+    """
+    __slots__ = (
+        'groups', 'permissions', 'expression', 'cacheable', 'memoizable', 'object_roles',
+        'verdicts', 'anonymous_verdicts', 'fingerprint'
+    )
+
+    def __init__(self, rules, method=None, action=None):
+        groups = compile_groups(rules.get('groups', ANY))
+        permissions = compile_permissions(rules.get('permissions', ANY))
+        expression = compile_groups_and_perms_expr(
+            rules.get('expression', DEFAULT_EXPRESSION)
+        )
+
+        groups = optimize(groups)
+        permissions = optimize(permissions)
+
+        def resolve_constant(operand):
+            if isinstance(permissions, Constant) and operand.value == 'permissions':
+                return permissions.value
+            if groups == Constant(True) and operand.value == 'groups':
+                # Constant False isn't folded since groups are skipped
+                # (evaluate to True) in some phases of list/retrieve
+                return True
+            return None
+        expression = optimize(expression.partial(resolve_constant))
+
+        if rules.get('reorder', True):
+            groups = reorder(groups)
+            permissions = reorder(permissions)
+            costs = {
+                'groups': get_cost(groups),
+                'permissions': get_cost(permissions)
+            }
+            expression = reorder(expression, lambda operand: costs[operand.value])
+
+        object.__setattr__(self, 'groups', groups)
+        object.__setattr__(self, 'permissions', permissions)
+        object.__setattr__(self, 'expression', expression)
+        # Decisions depending on request details can't be cached, nor can
+        # those depending on permission names since nothing invalidates
+        # them when permissions are revoked
+        object.__setattr__(self, 'cacheable', all(
+            operand.kind != PERMISSION_NAME and
+            getattr(operand.value, 'drf_guard_cacheable', True)
+            for operand in self.permissions.operands()
+        ))
+        # Groups depend on objects
+        object.__setattr__(self, 'object_roles', bool(get_role_lookups(self.groups)))
+        # Verdicts can be reused during a request
+        object.__setattr__(self, 'memoizable', all(
+            getattr(operand.value, 'drf_guard_memoize', True)
+            for operand in self.permissions.operands()
+            if operand.kind == PERMISSION_CLASS
+        ))
+        # Verdicts which are the same for all requests(or all anonymous
+        # requests) are answered without evaluating anything
+        object.__setattr__(self, 'verdicts', get_verdicts(self, method, action))
+        object.__setattr__(
+            self, 'anonymous_verdicts', get_verdicts(self, method, action, anonymous=True)
+        )
+        # Identifies compiled rules in all processes, rules compiled from
+        # the same `access_rules` have the same fingerprint
+        object.__setattr__(self, 'fingerprint', hashlib.md5(repr(
+            (sorted(self.describe().items()), method, action)
+        ).encode('utf-8')).hexdigest())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("`Rule` is immutable.")
+
+    def get_verdict(self, operand, phase, user):
+        """
+        Return precomputed verdict of `operand`(`groups`, `permissions`
+        or `expression`) in `phase` for `user`, `None` if it has to be
+        evaluated.
+        """
+        if user is None or not user.is_authenticated:
+            return self.anonymous_verdicts.get((operand, phase))
+        return self.verdicts.get((operand, phase))
+
+    def describe(self):
+        return {
+            'groups': str(self.groups),
+            'permissions': str(self.permissions),
+            'expression': str(self.expression)
+        }
+
+
+class AccessPlan():
+    """
+    Evaluation plan of view's `access_rules`, it's compiled once and
+    shared by all requests(and threads) to the view.
+
+    Keys of `access_rules` are HTTP methods(in uppercase), actions which
+    apply to all methods and `'default'` for methods without rules. Rules
+    of a method can have action sub-keys too, `list` and `retrieve` rules
+    are all allowed(`'__any__'`) if their sub-keys are missing.
+    """
+    actions = ('list', 'retrieve')
+
+    def __init__(self, access_rules):
+        self.access_rules = access_rules
+
+        self.methods = {}
+        self.action_rules = {}
+        self.default_rules = access_rules.get(DEFAULT_KEY)
+        actions = set(self.actions)
+        for key, value in access_rules.items():
+            if key == DEFAULT_KEY:
+                continue
+            if key.isupper():
+                self.methods[key] = value
+            else:
+                self.action_rules[key] = value
+                actions.add(key)
+
+        for method_rules in itertools.chain(self.methods.values(), [self.default_rules]):
+            for key, value in (method_rules or {}).items():
+                if isinstance(value, dict):
+                    actions.add(key)
+
+        # Flat index of compiled rules keyed by (method, action), `None`
+        # method is for methods without rules and `None` action is for
+        # actions without rules
+        self.rules = {}
+        for method in itertools.chain(self.methods, [None]):
+            for action in itertools.chain(actions, [None]):
+                self.rules[(method, action)] = Rule(
+                    self.get_rules(method, action), method, action
+                )
+
+    def get_rules(self, method, action):
+        """
+        Return uncompiled rules of an HTTP method and action.
+        """
+        method_rules = self.methods.get(method, self.default_rules)
+        if method_rules is not None and isinstance(method_rules.get(action), dict):
+            return method_rules[action]
+        if action in self.action_rules:
+            return self.action_rules[action]
+        if method_rules is None:
+            return {}
+        if action in self.actions:
+            # Rules of list/retrieve are not inherited from their method
+            return {}
+        return method_rules
+
+    def describe(self):
+        """
+        Return optimized rules as strings, useful for debugging.
+        """
+        return {
+            key: rule.describe()
+            for key, rule in sorted(self.rules.items(), key=lambda item: str(item[0]))
+        }
+
+    def get_rule(self, method, action):
+        if method not in self.methods:
+            method = None
+        try:
+            return self.rules[(method, action)]
+        except KeyError:
+            # Actions without rules share rules of their method
+            rule = self.rules[(method, None)]
+            self.rules[(method, action)] = rule
+            return rule
+
+
+_plans = {}
+# Shared by views without `access_rules`, so that their plans are reused
+NO_ACCESS_RULES = {}
+
+
+def get_access_plan(view):
+    """
+    Return compiled `access_rules` of a view, compile them on first use.
+    Rules from access rules file take precedence over `access_rules`.
+    """
+    from .rules_file import get_file_plan
+    view_class = type(view)
+    plan = get_file_plan(view_class)
+    if plan is not None:
+        return plan
+
+    access_rules = getattr(view, "access_rules", NO_ACCESS_RULES)
+    plan = _plans.get(view_class)
+    if plan is None or plan.access_rules is not access_rules:
+        # Compiling the same rules twice in a race is harmless
+        plan = AccessPlan(access_rules)
+        _plans[view_class] = plan
+    return plan
+
+
+async def aget_access_plan(view):
+    """
+    Async version of `get_access_plan`, compiling(or reloading access
+    rules file) may block so it's done in a thread.
+    """
+    # asgiref comes with Django >= 3.0, only async checks need it
+    from asgiref.sync import sync_to_async
+    plan = _plans.get(type(view))
+    if (get_setting('ACCESS_RULES_FILE') is None and plan is not None and
+            plan.access_rules is getattr(view, "access_rules", NO_ACCESS_RULES)):
+        return plan
+    return await sync_to_async(get_access_plan)(view)
+
+
+def compile_view(view_class):
+    """
+    Compile `access_rules` of a view class ahead of the first request.
+    """
+    from .rules_file import get_file_plan
+    plan = get_file_plan(view_class)
+    if plan is not None:
+        return plan
+
+    plan = AccessPlan(getattr(view_class, "access_rules", NO_ACCESS_RULES))
+    _plans[view_class] = plan
+    return plan
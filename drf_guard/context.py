@@ -0,0 +1,189 @@
+from .compiler import aget_access_plan, get_access_plan
+from .membership import GroupMembership, PermissionSet
+
+
+class EvaluationContext():
+    """
+    Request scoped state shared by drf_guard permission classes.
+    """
+    def __init__(self, user):
+        self.user = user
+        self.membership = GroupMembership(user)
+        self.permissions = PermissionSet(user)
+        self.results = {}
+        self.rules = {}
+        self.verdicts = {}
+        self.object_roles = {}
+
+    def get_rule(self, view, method, action):
+        """
+        Return access plan of a view and its rule for HTTP method and
+        action, they are looked up once per request.
+        """
+        key = (id(view), method, action)
+        try:
+            return self.rules[key][:2]
+        except KeyError:
+            plan = get_access_plan(view)
+            rule = plan.get_rule(method, action)
+            self.rules[key] = (plan, rule, view)
+            return plan, rule
+
+    async def aget_rule(self, view, method, action):
+        """
+        Async version of `get_rule`.
+        """
+        key = (id(view), method, action)
+        try:
+            return self.rules[key][:2]
+        except KeyError:
+            plan = await aget_access_plan(view)
+            rule = plan.get_rule(method, action)
+            self.rules[key] = (plan, rule, view)
+            return plan, rule
+
+    def verdict(self, key, obj, decide, memoize=True):
+        """
+        Return `decide()` memoized under `key` and `obj` for the rest of
+        the request, so that drf_guard permission classes share verdicts
+        of the same rules between classes and phases.
+        """
+        if not memoize:
+            return decide()
+        key = (key, id(obj))
+        try:
+            return self.verdicts[key][0]
+        except KeyError:
+            result = decide()
+            self.verdicts[key] = (result, obj)
+            return result
+
+    async def averdict(self, key, obj, adecide, memoize=True):
+        """
+        Async version of `verdict`, `adecide` is a coroutine function.
+        """
+        if not memoize:
+            return await adecide()
+        key = (key, id(obj))
+        try:
+            return self.verdicts[key][0]
+        except KeyError:
+            result = await adecide()
+            self.verdicts[key] = (result, obj)
+            return result
+
+    def prefetch_object_roles(self, lookups, objs):
+        """
+        Fetch user's roles on objects which aren't fetched yet, roles
+        of all objects are fetched at once for each lookup.
+        """
+        for lookup in lookups:
+            missing = [obj for obj in objs if (lookup, id(obj)) not in self.object_roles]
+            if not missing:
+                continue
+            for obj, roles in zip(missing, lookup.get_roles(self.user, missing)):
+                # Objects are stored to keep their ids from being reused
+                self.object_roles[(lookup, id(obj))] = (roles, obj)
+
+    def has_object_role(self, role, obj):
+        self.prefetch_object_roles([role.lookup], [obj])
+        return role.role in self.object_roles[(role.lookup, id(obj))][0]
+
+    def has_permission(self, permission, request, view, obj=None):
+        """
+        Call `has_permission`/`has_object_permission` of DRF permission
+        class, the result is memoized for the rest of the request unless
+        the class sets `drf_guard_memoize = False`.
+        """
+        if not getattr(permission, 'drf_guard_memoize', True):
+            return self.call_permission(permission, request, view, obj)
+
+        # `view` and `obj` are stored with the result to keep their ids
+        # from being reused by other objects during the request
+        key = (permission, id(view), id(obj))
+        try:
+            return self.results[key][0]
+        except KeyError:
+            result = self.call_permission(permission, request, view, obj)
+            self.results[key] = (result, view, obj)
+            return result
+
+    async def ahas_permission(self, permission, request, view, obj=None):
+        """
+        Async version of `has_permission`, classes can implement
+        `ahas_permission`/`ahas_object_permission` coroutines, other
+        classes are called in a thread.
+        """
+        memoize = getattr(permission, 'drf_guard_memoize', True)
+        key = (permission, id(view), id(obj))
+        if memoize and key in self.results:
+            return self.results[key][0]
+
+        result = await self.acall_permission(permission, request, view, obj)
+        if memoize:
+            self.results[key] = (result, view, obj)
+        return result
+
+    def has_objects_permission(self, permission, request, view, objs):
+        """
+        Return object level results of DRF permission class for a list
+        of objects, classes can evaluate many objects at once by
+        implementing `has_objects_permission(request, view, objs)`.
+        """
+        memoize = getattr(permission, 'drf_guard_memoize', True)
+        results = {}
+        missing = []
+        for obj in objs:
+            key = (permission, id(view), id(obj))
+            if memoize and key in self.results:
+                results[id(obj)] = self.results[key][0]
+            else:
+                missing.append(obj)
+
+        if hasattr(permission, 'has_objects_permission'):
+            values = permission().has_objects_permission(request, view, missing)
+        else:
+            instance = permission()
+            values = [
+                instance.has_object_permission(request, view, obj)
+                for obj in missing
+            ]
+
+        for obj, result in zip(missing, values):
+            results[id(obj)] = result
+            if memoize:
+                self.results[(permission, id(view), id(obj))] = (result, view, obj)
+        return [results[id(obj)] for obj in objs]
+
+    @staticmethod
+    def call_permission(permission, request, view, obj=None):
+        if obj is None:
+            return permission().has_permission(request, view)
+        return permission().has_object_permission(request, view, obj)
+
+    @staticmethod
+    async def acall_permission(permission, request, view, obj=None):
+        from asgiref.sync import sync_to_async
+        instance = permission()
+        if obj is None:
+            method = getattr(instance, 'ahas_permission', None)
+            if method is None:
+                return await sync_to_async(instance.has_permission)(request, view)
+            return await method(request, view)
+
+        method = getattr(instance, 'ahas_object_permission', None)
+        if method is None:
+            return await sync_to_async(instance.has_object_permission)(request, view, obj)
+        return await method(request, view, obj)
+
+
+def get_context(request):
+    """
+    Return evaluation context of a request, create it if it doesn't exist.
+    """
+    user = getattr(request, 'user', None)
+    context = getattr(request, '_drf_guard_context', None)
+    if context is None or context.user is not user:
+        context = EvaluationContext(user)
+        request._drf_guard_context = context
+    return context
@@ -0,0 +1,190 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+from .context import get_context
+from .settings import get_setting
+
+
+class DecisionCache():
+    """
+    Cache of `has_permission` verdicts keyed by user, user's groups and
+    flags, view, method, action and fingerprint of the compiled rule.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        raise NotImplementedError()
+
+    def set(self, key, decision):
+        raise NotImplementedError()
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class MemoryDecisionCache(DecisionCache):
+    """
+    Bounded LRU cache in process memory.
+    """
+    def __init__(self, max_size, timeout):
+        super().__init__()
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                # Expired
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, decision):
+        expires_at = time.monotonic() + self.timeout
+        with self.lock:
+            self.entries[key] = (decision, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                # Evict least recently used entry
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        super().clear()
+        with self.lock:
+            self.entries.clear()
+
+
+class DjangoDecisionCache(DecisionCache):
+    """
+    Cache stored in a Django cache backend.
+    """
+    key_prefix = 'drf_guard:decision:'
+
+    def __init__(self, alias, timeout):
+        super().__init__()
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def make_key(self, key):
+        # Keys are tuples which aren't valid cache keys
+        digest = hashlib.md5(repr(key).encode('utf-8')).hexdigest()
+        return self.key_prefix + digest
+
+    def get(self, key):
+        decision = self.cache.get(self.make_key(key))
+        if decision is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return decision
+
+    def set(self, key, decision):
+        self.cache.set(self.make_key(key), decision, self.timeout)
+
+    def clear(self):
+        # Only counters are reset, entries expire by themselves since
+        # there is no way to delete them without deleting other data
+        # in the same cache
+        super().clear()
+
+
+_decision_cache = (None, None)
+
+
+def get_decision_cache():
+    """
+    Return the decision cache configured with `DECISION_CACHE` setting,
+    `None` if the cache is disabled.
+    """
+    global _decision_cache
+    config = (
+        get_setting('DECISION_CACHE'),
+        get_setting('DECISION_CACHE_SIZE'),
+        get_setting('DECISION_CACHE_TIMEOUT')
+    )
+    if _decision_cache[0] == config:
+        return _decision_cache[1]
+
+    backend, max_size, timeout = config
+    if backend is None:
+        cache = None
+    elif backend == 'memory':
+        cache = MemoryDecisionCache(max_size, timeout)
+    else:
+        cache = DjangoDecisionCache(backend, timeout)
+    _decision_cache = (config, cache)
+    return cache
+
+
+def get_decision_key(permission, request, view, rule):
+    user = getattr(request, 'user', None)
+    membership = get_context(request).membership
+    view_class = type(view)
+    return (
+        type(permission).__module__, type(permission).__qualname__,
+        getattr(user, 'pk', None), tuple(sorted(membership.ids)),
+        tuple(sorted(membership.implied)),
+        # Checked by DRF permissions like `IsAdminUser` and by backends
+        getattr(user, 'is_active', None), getattr(user, 'is_staff', None),
+        getattr(user, 'is_superuser', None),
+        view_class.__module__, view_class.__qualname__,
+        request.method, getattr(view, 'action', None), rule.fingerprint
+    )
+
+
+def cached_decision(permission, request, view, rule, decide):
+    """
+    Return cached verdict of `decide()` if decision cache is enabled
+    and the rule can be cached.
+    """
+    cache = get_decision_cache()
+    if cache is None or not rule.cacheable:
+        return decide()
+
+    key = get_decision_key(permission, request, view, rule)
+    decision = cache.get(key)
+    if decision is None:
+        decision = bool(decide())
+        cache.set(key, decision)
+    return decision
+
+
+async def acached_decision(permission, request, view, rule, adecide):
+    """
+    Async version of `cached_decision`, `adecide` is a coroutine function.
+    """
+    from asgiref.sync import sync_to_async
+    cache = get_decision_cache()
+    if cache is None or not rule.cacheable:
+        return await adecide()
+
+    await get_context(request).membership.aload()
+    key = get_decision_key(permission, request, view, rule)
+    if isinstance(cache, MemoryDecisionCache):
+        decision = cache.get(key)
+    else:
+        decision = await sync_to_async(cache.get)(key)
+    if decision is None:
+        decision = bool(await adecide())
+        if isinstance(cache, MemoryDecisionCache):
+            cache.set(key, decision)
+        else:
+            await sync_to_async(cache.set)(key, decision)
+    return decision
@@ -0,0 +1,139 @@
+import itertools
+import logging
+
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+from .compiler import (
+    AndExpr, Constant, NotExpr, Operand, OrExpr, OBJECT_ROLE, PERMISSION_CLASS,
+    get_access_plan
+)
+from .context import get_context
+from .permissions import (
+    HasRequiredGroups, HasRequiredPermissions, overrides_object_permission
+)
+
+
+logger = logging.getLogger('drf_guard')
+
+
+def negate(condition):
+    if isinstance(condition, Q):
+        return ~condition
+    return not condition
+
+
+def combine(conditions, operator, identity):
+    combined = identity
+    for condition in conditions:
+        if not isinstance(condition, Q):
+            if bool(condition) is not identity:
+                # Shortcircuit, False for `&` and True for `|`
+                return not identity
+            continue
+        if combined is identity:
+            combined = condition
+        else:
+            combined = operator(combined, condition)
+    return combined
+
+
+def to_condition(expression, resolve):
+    """
+    Convert compiled expression into a `Q` object, `True` or `False`,
+    `resolve` converts each operand into one of those.
+    """
+    if isinstance(expression, Constant):
+        return expression.value
+    if isinstance(expression, Operand):
+        return resolve(expression)
+    if isinstance(expression, NotExpr):
+        return negate(to_condition(expression.child, resolve))
+    conditions = (to_condition(child, resolve) for child in expression.children)
+    if isinstance(expression, AndExpr):
+        return combine(conditions, Q.__and__, True)
+    if isinstance(expression, OrExpr):
+        return combine(conditions, Q.__or__, False)
+    raise TypeError("`%s` is an invalid expression." % type(expression).__name__)
+
+
+class AccessRulesFilter(BaseFilterBackend):
+    """
+    Filter queryset of list endpoints with object level access rules,
+    rules of `retrieve` action are used by default.
+
+    Permission classes in object level rules must implement
+    `object_permission_filter(request, view)` which returns a `Q` object
+    (or a boolean) equivalent to their `has_object_permission`.
+    """
+    action = 'retrieve'
+
+    def get_permission_condition(self, operand, request, view):
+        if operand.kind != PERMISSION_CLASS:
+            return HasRequiredPermissions.eval_permission(operand, request, view)
+
+        permission = operand.value
+        if hasattr(permission, 'object_permission_filter'):
+            return permission().object_permission_filter(request, view)
+        if not overrides_object_permission(permission):
+            # Object level permission always allows access
+            return True
+
+        # Reported by system checks, objects are hidden rather than exposed
+        logger.error(
+            "`%s` must implement `object_permission_filter()` to be used with `%s`.",
+            permission.__name__, type(self).__name__
+        )
+        return False
+
+    @staticmethod
+    def is_filterable(permission):
+        return (
+            hasattr(permission, 'object_permission_filter') or
+            not overrides_object_permission(permission)
+        )
+
+    def get_unfilterable_permissions(self, plan):
+        """
+        Return permission classes in rules used by this filter which
+        can't be converted into filters, they are reported by system checks.
+        """
+        permissions = []
+        for method in itertools.chain(plan.methods, [None]):
+            rule = plan.get_rule(method, self.action)
+            for operand in rule.permissions.operands():
+                permission = operand.value
+                if (operand.kind == PERMISSION_CLASS and permission not in permissions and
+                        not self.is_filterable(permission)):
+                    permissions.append(permission)
+        return permissions
+
+    def get_condition(self, request, view):
+        rule = get_access_plan(view).get_rule(request.method, self.action)
+        context = get_context(request)
+
+        def resolve_permission(operand):
+            return self.get_permission_condition(operand, request, view)
+
+        def resolve_group(operand):
+            if operand.kind == OBJECT_ROLE:
+                role = operand.value
+                return role.lookup.object_filter(request.user, role.role)
+            return operand.value in context.membership
+
+        def resolve(operand):
+            if operand.value == 'groups' and rule.object_roles:
+                return to_condition(rule.groups, resolve_group)
+            if operand.value == 'groups':
+                return HasRequiredGroups.eval_groups(rule.groups, context.membership)
+            return to_condition(rule.permissions, resolve_permission)
+
+        return to_condition(rule.expression, resolve)
+
+    def filter_queryset(self, request, queryset, view):
+        condition = self.get_condition(request, view)
+        if isinstance(condition, Q):
+            return queryset.filter(condition)
+        if condition:
+            return queryset
+        return queryset.none()
@@ -0,0 +1,151 @@
+import threading
+
+from django.contrib.auth.models import Group
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import get_setting
+
+
+class GroupIndex():
+    """
+    Process wide map of group names to primary keys.
+
+    It's filled with groups fetched by `GroupMembership`(so it costs no
+    extra queries) and kept up to date when groups are saved or deleted.
+    Names are looked up without locking, only writers take the lock.
+    """
+    def __init__(self):
+        self._ids = {}
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def get_id(self, name):
+        return self._ids.get(name)
+
+    def get_name(self, group_id):
+        return self._names.get(group_id)
+
+    def update(self, groups):
+        """
+        Record `(id, name)` pairs of groups, names which used to point
+        to the same ids(renamed groups) are dropped.
+        """
+        with self._lock:
+            for group_id, name in groups:
+                old_name = self._names.get(group_id)
+                if old_name == name:
+                    continue
+                if old_name is not None and self._ids.get(old_name) == group_id:
+                    del self._ids[old_name]
+                old_id = self._ids.get(name)
+                if old_id is not None and self._names.get(old_id) == name:
+                    del self._names[old_id]
+                self._ids[name] = group_id
+                self._names[group_id] = name
+
+    def discard(self, group_id):
+        with self._lock:
+            name = self._names.pop(group_id, None)
+            if name is not None and self._ids.get(name) == group_id:
+                del self._ids[name]
+
+    def clear(self):
+        with self._lock:
+            self._ids = {}
+            self._names = {}
+
+
+group_index = GroupIndex()
+
+
+class GroupHierarchy():
+    """
+    Transitive closure of `GROUP_HIERARCHY` setting which maps names of
+    groups to names of groups they include, members of a group are
+    members of all groups it includes directly or indirectly.
+    """
+    def __init__(self, hierarchy):
+        self.hierarchy = hierarchy
+        if not isinstance(hierarchy, dict):
+            msg = "`GROUP_HIERARCHY` must be a dict, not `%s`." % type(hierarchy).__name__
+            raise ImproperlyConfigured(msg)
+
+        self.descendants = {}
+        for group in hierarchy:
+            self.descendants[group] = self.get_descendants(group)
+
+        ancestors = {}
+        for group, descendants in self.descendants.items():
+            for descendant in descendants:
+                ancestors.setdefault(descendant, set()).add(group)
+        self.ancestors = {
+            group: frozenset(groups) for group, groups in ancestors.items()
+        }
+
+    def get_descendants(self, group):
+        descendants = set()
+        pending = [group]
+        while pending:
+            for child in self.hierarchy.get(pending.pop(), ()):
+                if child != group and child not in descendants:
+                    # Cycles make groups equivalent, they aren't an error
+                    descendants.add(child)
+                    pending.append(child)
+        return frozenset(descendants)
+
+    def expand(self, names):
+        """
+        Return names of groups which `names` include but aren't in `names`.
+        """
+        implied = set()
+        for name in names:
+            implied.update(self.descendants.get(name, ()))
+        return frozenset(implied.difference(names))
+
+    def get_ancestors(self, name):
+        """
+        Return names of groups which include group `name`.
+        """
+        return self.ancestors.get(name, frozenset())
+
+
+_hierarchy = None
+
+
+def get_group_hierarchy():
+    """
+    Return compiled `GROUP_HIERARCHY`, it's recompiled when the setting
+    changes and `None` is returned if there is no hierarchy.
+    """
+    global _hierarchy
+    hierarchy = get_setting('GROUP_HIERARCHY')
+    if not hierarchy:
+        return None
+    compiled = _hierarchy
+    if compiled is None or compiled.hierarchy is not hierarchy:
+        compiled = GroupHierarchy(hierarchy)
+        _hierarchy = compiled
+    return compiled
+
+
+def get_group_name(group):
+    """
+    Return name of a group operand, `None` if it's an unknown id.
+    """
+    if isinstance(group, Group):
+        return group.name
+    if isinstance(group, int):
+        return group_index.get_name(group)
+    return group
+
+
+def get_group_id(group):
+    """
+    Return primary key of a group operand(name, id or `Group` instance),
+    `None` if a group with that name isn't known.
+    """
+    if isinstance(group, Group):
+        return group.pk
+    if isinstance(group, int):
+        return group
+    return group_index.get_id(group)
@@ -0,0 +1,239 @@
+import asyncio
+import functools
+import threading
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.dispatch import Signal
+from django.utils.module_loading import import_string
+
+from .rules_file import get_view_path
+from .settings import get_setting
+
+
+# Sent after each instrumented `has_permission`/`has_object_permission`
+# call with `evaluation` argument
+permission_evaluated = Signal()
+
+
+class Evaluation():
+    """
+    Record of a single permission check.
+    """
+    def __init__(self, permission, view, method, action, phase):
+        self.permission = permission
+        self.view = view
+        self.method = method
+        self.action = action
+        self.phase = phase
+        self.verdict = None
+        self.duration = 0
+        # `None` if queries couldn't be counted
+        self.queries = 0
+        # (operand, value) pairs in the order they were evaluated
+        self.evaluated = []
+        # Operands whose values were not needed
+        self.skipped = []
+        self.expressions = []
+
+    def resolve(self, resolve):
+        """
+        Wrap operand resolver of an expression to record evaluated operands.
+        """
+        def wrapper(operand):
+            value = resolve(operand)
+            self.evaluated.append((str(operand), value))
+            return value
+        return wrapper
+
+    def finish(self):
+        evaluated = {operand for operand, value in self.evaluated}
+        for expression in self.expressions:
+            for operand in expression.operands():
+                name = str(operand)
+                if name not in evaluated and name not in self.skipped:
+                    self.skipped.append(name)
+
+    @property
+    def tags(self):
+        return {
+            # Module-qualified, views in different modules share names
+            'permission': get_view_path(self.permission),
+            'view': get_view_path(self.view),
+            'method': self.method,
+            'action': self.action,
+            'phase': self.phase
+        }
+
+
+class Collector():
+    """
+    Base class of collectors of permission check records.
+    """
+    def collect(self, evaluation):
+        raise NotImplementedError()
+
+
+class InMemoryCollector(Collector):
+    """
+    Aggregate permission checks by permission class, view, method,
+    action and phase in process memory.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def collect(self, evaluation):
+        tags = evaluation.tags
+        key = (
+            tags['permission'], tags['view'], tags['method'],
+            tags['action'], tags['phase']
+        )
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = {
+                    'count': 0, 'allowed': 0, 'denied': 0,
+                    'total_time': 0, 'max_time': 0, 'queries': 0,
+                    'evaluated': 0, 'skipped': 0
+                }
+            entry['count'] += 1
+            entry['allowed' if evaluation.verdict else 'denied'] += 1
+            entry['total_time'] += evaluation.duration
+            entry['max_time'] = max(entry['max_time'], evaluation.duration)
+            if evaluation.queries is None or entry['queries'] is None:
+                entry['queries'] = None
+            else:
+                entry['queries'] += evaluation.queries
+            entry['evaluated'] += len(evaluation.evaluated)
+            entry['skipped'] += len(evaluation.skipped)
+
+    def stats(self):
+        with self.lock:
+            return {key: dict(entry) for key, entry in self.entries.items()}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_collector = (None, None)
+
+
+def get_collector():
+    """
+    Return the collector configured with `INSTRUMENTATION_COLLECTOR`
+    setting, `None` if there is no collector.
+    """
+    global _collector
+    path = get_setting('INSTRUMENTATION_COLLECTOR')
+    if _collector[0] == path:
+        return _collector[1]
+
+    collector = None if path is None else import_string(path)()
+    _collector = (path, collector)
+    return collector
+
+
+def trace(request, expression, resolve):
+    """
+    Return operand resolver of `expression`, which records evaluated
+    operands if the check being made is instrumented.
+    """
+    evaluation = getattr(request, '_drf_guard_evaluation', None)
+    if evaluation is None:
+        return resolve
+    evaluation.expressions.append(expression)
+    return evaluation.resolve(resolve)
+
+
+class QueryCounter():
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def can_count_queries():
+    # `execute_wrapper` was added in Django 2.0
+    return all(hasattr(connection, 'execute_wrapper') for connection in connections.all())
+
+
+def record(permission, evaluation):
+    evaluation.finish()
+    collector = get_collector()
+    if collector is not None:
+        collector.collect(evaluation)
+    permission_evaluated.send(sender=type(permission), evaluation=evaluation)
+
+
+def instrument(phase):
+    """
+    Decorate `has_permission`/`has_object_permission`(or their async
+    versions) of a permission class to record the check when
+    `INSTRUMENTATION` setting is on.
+    """
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+            return ainstrument(phase, method)
+
+        @functools.wraps(method)
+        def wrapper(self, request, view, *args):
+            if not get_setting('INSTRUMENTATION'):
+                return method(self, request, view, *args)
+
+            evaluation = Evaluation(
+                type(self), type(view), request.method,
+                getattr(view, 'action', None), phase
+            )
+            # Nested checks(e.g groups of HasRequiredAccessRules) are
+            # recorded separately
+            parent = getattr(request, '_drf_guard_evaluation', None)
+            request._drf_guard_evaluation = evaluation
+            counter = QueryCounter() if can_count_queries() else None
+            start = time.perf_counter()
+            try:
+                with ExitStack() as stack:
+                    if counter is not None:
+                        for connection in connections.all():
+                            stack.enter_context(connection.execute_wrapper(counter))
+                    evaluation.verdict = method(self, request, view, *args)
+            finally:
+                evaluation.duration = time.perf_counter() - start
+                request._drf_guard_evaluation = parent
+
+            evaluation.queries = None if counter is None else counter.count
+            record(self, evaluation)
+            return evaluation.verdict
+        return wrapper
+    return decorator
+
+
+def ainstrument(phase, method):
+    """
+    Async version of `instrument`. Queries run in other threads and
+    nested checks run concurrently, so only verdicts and durations of
+    async checks are recorded.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, request, view, *args):
+        if not get_setting('INSTRUMENTATION'):
+            return await method(self, request, view, *args)
+
+        evaluation = Evaluation(
+            type(self), type(view), request.method,
+            getattr(view, 'action', None), phase
+        )
+        evaluation.queries = None
+        start = time.perf_counter()
+        try:
+            evaluation.verdict = await method(self, request, view, *args)
+        finally:
+            evaluation.duration = time.perf_counter() - start
+
+        record(self, evaluation)
+        return evaluation.verdict
+    return wrapper
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from drf_guard.checks import get_guarded_views
+from drf_guard.compiler import compile_view
+
+
+class Command(BaseCommand):
+    help = "Show optimized access rules of all views in the URLconf."
+
+    def handle(self, *args, **options):
+        for view in get_guarded_views():
+            self.stdout.write('%s.%s' % (view.__module__, view.__qualname__))
+            plan = compile_view(view)
+            for (method, action), rule in plan.describe().items():
+                endpoint = method if action is None else '%s %s' % (method, action)
+                self.stdout.write('  %s' % endpoint)
+                for key, value in rule.items():
+                    self.stdout.write('    %s: %s' % (key, value))
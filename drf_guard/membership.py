@@ -0,0 +1,164 @@
+from django.contrib import auth
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import get_cached_groups, get_membership_cache, set_cached_groups
+from .groups import get_group_hierarchy, get_group_id, get_group_name, group_index
+
+
+class GroupMembership():
+    """
+    Groups of a user, fetched with a single query the first time
+    they are needed and checked in memory afterwards.
+
+    Group operands are resolved to primary keys(through the process
+    wide group index) and checked against ids of user's groups, groups
+    included by user's groups in `GROUP_HIERARCHY` are checked by name.
+    """
+    def __init__(self, user):
+        self.user = user
+        self._ids = None
+        self._names = None
+        self._implied = frozenset()
+
+    def load(self):
+        user = self.user
+        if user is None or not user.is_authenticated:
+            # Anonymous users don't belong to any group
+            return ()
+
+        cache = get_membership_cache()
+        if cache is not None:
+            version, groups = get_cached_groups(cache, user.pk)
+            if groups is not None:
+                return groups
+
+        groups = tuple(user.groups.values_list('id', 'name'))
+        if cache is not None:
+            set_cached_groups(cache, user.pk, version, groups)
+        return groups
+
+    def set_groups(self, groups):
+        # User's groups are the freshest names we have
+        group_index.update(groups)
+        self._names = frozenset(name for group_id, name in groups)
+        self._ids = frozenset(group_id for group_id, name in groups)
+        hierarchy = get_group_hierarchy()
+        if hierarchy is not None:
+            self._implied = hierarchy.expand(self._names)
+
+    async def aload(self):
+        """
+        Fetch groups in a thread so that async code can check them
+        without blocking.
+        """
+        from asgiref.sync import sync_to_async
+        if self._ids is None:
+            self.set_groups(await sync_to_async(self.load)())
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self.set_groups(self.load())
+        return self._ids
+
+    @property
+    def names(self):
+        if self._names is None:
+            self.set_groups(self.load())
+        return self._names
+
+    @property
+    def implied(self):
+        """
+        Names of groups included by user's groups in `GROUP_HIERARCHY`.
+        """
+        if self._ids is None:
+            self.set_groups(self.load())
+        return self._implied
+
+    def __contains__(self, group):
+        ids = self.ids
+        # Names of user's groups are in the index once they are loaded,
+        # so unknown names aren't user's groups
+        if get_group_id(group) in ids:
+            return True
+        return bool(self._implied) and get_group_name(group) in self._implied
+
+
+try:
+    from django.contrib.auth.backends import BaseBackend
+except ImportError:
+    # Django < 3.0
+    BaseBackend = None
+
+# `has_perm` implementations which grant only what `get_all_permissions` lists
+LISTED_HAS_PERMS = tuple(
+    backend.has_perm for backend in (BaseBackend, ModelBackend) if backend is not None
+)
+
+
+def lists_permissions(backend):
+    """
+    Whether `get_all_permissions` of an authentication backend lists
+    every permission its `has_perm` grants.
+    """
+    has_perm = getattr(type(backend), 'has_perm', None)
+    if has_perm is None:
+        # Backends without `has_perm` grant nothing
+        return True
+    return hasattr(backend, 'get_all_permissions') and has_perm in LISTED_HAS_PERMS
+
+
+class PermissionSet():
+    """
+    Permissions of a user, loaded once through all authentication
+    backends and checked in memory afterwards.
+    """
+    def __init__(self, user):
+        self.user = user
+        self._names = None
+        self.superuser = False
+        # Whether all backends can list user's permissions, otherwise
+        # names which aren't listed are checked with `user.has_perm`
+        self.complete = True
+
+    def load(self):
+        user = self.user
+        if user is None:
+            return frozenset()
+        if not user.is_active:
+            # Backends may grant permissions to inactive(and anonymous)
+            # users, so they are asked with `has_perm`
+            self.complete = False
+            return frozenset()
+        if user.is_superuser:
+            # Active superusers have all permissions
+            self.superuser = True
+            return frozenset()
+        if not hasattr(user, 'get_all_permissions'):
+            self.complete = False
+            return frozenset()
+        self.complete = all(lists_permissions(backend) for backend in auth.get_backends())
+        return frozenset(user.get_all_permissions())
+
+    def _get_names(self):
+        if self._names is None:
+            self._names = self.load()
+        return self._names
+
+    async def aload(self):
+        """
+        Load permissions in a thread so that async code can check them
+        without blocking.
+        """
+        from asgiref.sync import sync_to_async
+        if self._names is None:
+            await sync_to_async(self._get_names)()
+
+    def __contains__(self, name):
+        names = self._get_names()
+        if self.superuser or name in names:
+            return True
+        if not self.complete:
+            return self.user.has_perm(name)
+        return False
@@ -0,0 +1,153 @@
+import re
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+from rest_framework import permissions
+
+from .compiler import AndExpr, NotExpr, OrExpr, is_operator
+
+
+TOKEN_REGEX = re.compile(r"""
+    \s*(?:
+        (?P<paren>[()])
+        | '(?P<single_quoted>[^']*)'
+        | "(?P<double_quoted>[^"]*)"
+        | (?P<word>[^\s()'"]+)
+    )
+""", re.VERBOSE)
+
+KEYWORDS = ('and', 'or', 'not')
+
+
+def tokenize(text):
+    """
+    Split expression into `(type, value)` tokens, types are `'('`, `')'`,
+    `'and'`, `'or'`, `'not'` and `'operand'`.
+    """
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_REGEX.match(text, position)
+        if match is None:
+            msg = "Invalid access rule expression `%s`." % text
+            raise TypeError(msg)
+        position = match.end()
+
+        if match.group('paren'):
+            tokens.append((match.group('paren'), None))
+        elif match.group('word') is not None:
+            word = match.group('word')
+            if word.lower() in KEYWORDS:
+                tokens.append((word.lower(), None))
+            else:
+                tokens.append(('operand', word))
+        else:
+            # Quoted operands can contain spaces, parentheses and keywords
+            quoted = match.group('single_quoted')
+            if quoted is None:
+                quoted = match.group('double_quoted')
+            tokens.append(('operand', quoted))
+    return tokens
+
+
+class Parser():
+    """
+    Recursive descent parser of boolean expressions like
+    `"admin or (client and not seller)"`, `not` has the highest
+    precedence followed by `and` then `or`.
+    """
+    def __init__(self, text, make_operand):
+        self.text = text
+        self.make_operand = make_operand
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def error(self, msg):
+        raise TypeError("%s in access rule expression `%s`." % (msg, self.text))
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def next(self):
+        token = self.tokens[self.position]
+        self.position = self.position + 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            self.error("Missing operand")
+        expression = self.parse_or()
+        if self.peek() is not None:
+            self.error("Unexpected `%s`" % (self.tokens[self.position][1] or self.peek()))
+        return expression
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == 'or':
+            self.next()
+            children.append(self.parse_and())
+        if len(children) == 1:
+            return children[0]
+        return OrExpr(children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() == 'and':
+            self.next()
+            children.append(self.parse_not())
+        if len(children) == 1:
+            return children[0]
+        return AndExpr(children)
+
+    def parse_not(self):
+        if self.peek() == 'not':
+            self.next()
+            return NotExpr(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.peek()
+        if token == '(':
+            self.next()
+            expression = self.parse_or()
+            if self.peek() != ')':
+                self.error("Missing `)`")
+            self.next()
+            return expression
+        if token == 'operand':
+            return self.make_operand(self.next()[1])
+        if token is None:
+            self.error("Missing operand")
+        self.error("Unexpected `%s`" % token)
+
+
+@lru_cache(maxsize=512)
+def parse_expression(text, make_operand):
+    """
+    Parse string expression into a compiled expression, the result is
+    cached by expression text since compiled expressions are immutable.
+    """
+    return Parser(text, make_operand).parse()
+
+
+def resolve_permission_class(name):
+    """
+    Return DRF permission class named in a string expression, either by
+    its import path or by its name in `rest_framework.permissions`,
+    `None` is returned for names which aren't permission classes.
+    """
+    if '.' in name:
+        try:
+            permission = import_string(name)
+        except ImportError:
+            # It's a permission name like `app_label.codename`
+            return None
+    else:
+        permission = getattr(permissions, name, None)
+
+    if is_operator(permission, permissions.BasePermission):
+        return permission
+    return None
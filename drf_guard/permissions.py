@@ -1,7 +1,18 @@
 from rest_framework import permissions
 from django.contrib.auth.models import Group, Permission
+from django.db.models import Q
 
-from .operators import Operator, Reducer
+from .operators import Operator
+from .compiler import (
+    OBJECT_ROLE, PERMISSION_CLASS, PERMISSION_NAME, Constant, get_permission_name,
+    compile_groups, compile_groups_and_perms_expr, compile_permissions,
+    get_access_plan, get_role_lookups, overrides_object_permission
+)
+from .context import get_context
+from .decisions import acached_decision, cached_decision
+from .groups import get_group_hierarchy, get_group_id, get_group_name
+from .instrumentation import instrument, trace
+from .membership import GroupMembership
 
 
 class HasRequiredGroups(permissions.BasePermission):
@@ -10,8 +21,14 @@ class HasRequiredGroups(permissions.BasePermission):
     """
     @classmethod
     def is_in_group(cls, user, group):
-        if isinstance(group, (str, Group)):
-            return user.groups.filter(name=group).exists()
+        if isinstance(group, (str, int, Group)):
+            condition = Q(name=group) if isinstance(group, str) else Q(pk=get_group_id(group))
+            hierarchy = get_group_hierarchy()
+            if hierarchy is not None:
+                # Members of groups which include this group
+                ancestors = hierarchy.get_ancestors(get_group_name(group))
+                condition = condition | Q(name__in=ancestors)
+            return user.groups.filter(condition).exists()
         if isinstance(group, (list, tuple)):
             return cls.is_in_required_groups(user, group)
         if issubclass(group, Operator):
@@ -25,44 +42,145 @@ class HasRequiredGroups(permissions.BasePermission):
             # If there are no groups to check
             return False
 
-        reducer = Reducer()
-        return reducer(
-            (cls.is_in_group(user, group) for group in groups)
-        )
+        return cls.eval_groups(compile_groups(groups), GroupMembership(user))
 
     @staticmethod
-    def get_groups(request, view):
-        # Get a mapping of methods -> access rules
-        access_rules = getattr(view, "access_rules", {})
+    def eval_groups(groups, membership, request=None, obj=None):
+        def resolve(operand):
+            if operand.kind == OBJECT_ROLE:
+                if obj is None:
+                    # Checked with objects
+                    return None
+                return get_context(request).has_object_role(operand.value, obj)
+            return operand.value in membership
+
+        if obj is None and get_role_lookups(groups):
+            # Like DRF object permissions, groups which depend on objects
+            # pass until they are checked with objects
+            groups = groups.partial(resolve)
+            return not isinstance(groups, Constant) or groups.value
+        return groups.evaluate(trace(request, groups, resolve))
 
-        # Get access rules for this particular request method.
-        http_method_access_rules = access_rules.get(request.method, {})
-
-        default_groups = '__any__'
+    @classmethod
+    async def aeval_groups(cls, groups, request, obj=None):
+        from asgiref.sync import sync_to_async
+        context = get_context(request)
+        membership = context.membership
+        if next(groups.operands(), None) is not None:
+            # Groups are checked in memory once they are fetched
+            await membership.aload()
+        lookups = get_role_lookups(groups)
+        if obj is not None and lookups:
+            await sync_to_async(context.prefetch_object_roles)(lookups, [obj])
+        return cls.eval_groups(groups, membership, request, obj)
 
-        if view.action in ['list', 'retrieve']:
-            # Get required group related access rules for list action
-            http_method_access_rules = http_method_access_rules.get(
-                view.action, {'groups': default_groups}
-            )
+    @classmethod
+    def eval_objects_groups(cls, groups, request, objs):
+        """
+        Evaluate groups for a list of objects, roles on all objects are
+        fetched at once.
+        """
+        context = get_context(request)
+        context.prefetch_object_roles(get_role_lookups(groups), objs)
+        return [
+            cls.eval_groups(groups, context.membership, request, obj)
+            for obj in objs
+        ]
 
-        return http_method_access_rules.get('groups', default_groups)
+    @staticmethod
+    def get_groups(request, view):
+        # Get access rules for this particular request method and action
+        rules = get_access_plan(view).get_rules(request.method, view.action)
+        return rules.get('groups', '__any__')
 
+    @instrument('has_permission')
     def has_permission(self, request, view):
         if view.action == 'retrieve':
             # Separate retrive URL(This will be handled in has_object_permission)
             return True
 
-        required_groups = self.get_groups(request, view)
-        return self.is_in_required_groups(request.user, required_groups)
+        context = get_context(request)
+        plan, rule = context.get_rule(view, request.method, view.action)
+        # Verdicts of constant rules and anonymous users are precomputed
+        verdict = rule.get_verdict('groups', 'has_permission', context.user)
+        if verdict is not None:
+            return verdict
+        # Groups don't depend on objects, so the verdict is shared by
+        # both phases
+        return context.verdict(('groups', rule.groups), None, lambda: cached_decision(
+            self, request, view, rule,
+            lambda: self.eval_groups(rule.groups, context.membership, request)
+        ))
 
+    @instrument('has_object_permission')
     def has_object_permission(self, request, view, obj):
         if view.action == 'list':
             # Separate list URL(This will be handled in has_permission)
             return True
 
-        required_groups = self.get_groups(request, view)
-        return self.is_in_required_groups(request.user, required_groups)
+        context = get_context(request)
+        plan, rule = context.get_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('groups', 'has_object_permission', context.user)
+        if verdict is not None:
+            return verdict
+        # Verdict of groups without object roles is shared by both phases
+        scope = obj if rule.object_roles else None
+        return context.verdict(
+            ('groups', rule.groups), scope,
+            lambda: self.eval_groups(rule.groups, context.membership, request, scope)
+        )
+
+    @instrument('has_permission')
+    async def ahas_permission(self, request, view):
+        """
+        Async version of `has_permission`.
+        """
+        if view.action == 'retrieve':
+            return True
+
+        context = get_context(request)
+        plan, rule = await context.aget_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('groups', 'has_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return await context.averdict(('groups', rule.groups), None, lambda: acached_decision(
+            self, request, view, rule,
+            lambda: self.aeval_groups(rule.groups, request)
+        ))
+
+    @instrument('has_object_permission')
+    async def ahas_object_permission(self, request, view, obj):
+        """
+        Async version of `has_object_permission`.
+        """
+        if view.action == 'list':
+            return True
+
+        context = get_context(request)
+        plan, rule = await context.aget_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('groups', 'has_object_permission', context.user)
+        if verdict is not None:
+            return verdict
+        scope = obj if rule.object_roles else None
+        return await context.averdict(
+            ('groups', rule.groups), scope,
+            lambda: self.aeval_groups(rule.groups, request, scope)
+        )
+
+    def filter_permitted(self, request, view, objs):
+        """
+        Return objects from `objs` which pass `has_object_permission`.
+        """
+        objs = list(objs)
+        plan, rule = get_context(request).get_rule(view, request.method, view.action)
+        if rule.object_roles and view.action != 'list':
+            results = self.eval_objects_groups(rule.groups, request, objs)
+            return [obj for obj, result in zip(objs, results) if result]
+
+        if self.has_object_permission(request, view, None):
+            # Groups don't depend on objects
+            return objs
+        return []
 
 
 class HasRequiredPermissions(permissions.BasePermission):
@@ -72,11 +190,11 @@ class HasRequiredPermissions(permissions.BasePermission):
     @classmethod
     def has_required_permission(cls, permission, request, view, obj=None):
         if isinstance(permission, str):
-            return request.user.has_perm(permission)
+            return permission in get_context(request).permissions
         elif isinstance(permission, (list, tuple)):
             return cls.has_required_permissions(permission, request, view, obj)
         elif isinstance(permission, Permission):
-            return request.user.has_perm(permission.codename)
+            return get_permission_name(permission) in get_context(request).permissions
         elif issubclass(permission, permissions.BasePermission):
             if obj is None:
                 return permission().has_permission(request, view)
@@ -97,37 +215,158 @@ class HasRequiredPermissions(permissions.BasePermission):
             # If there are no permissions to check
             return False
 
-        reducer = Reducer()
-        return reducer((
-            cls.has_required_permission(permission, *args)
-            for permission in permissions
-        ))
+        return cls.eval_permissions(compile_permissions(permissions), *args)
 
-    @staticmethod
-    def get_permissions(request, view):
-        # Get a mapping of methods -> access rules
-        access_rules = getattr(view, "access_rules", {})
+    @classmethod
+    def eval_permission(cls, operand, request, view, obj=None):
+        kind = operand.kind
+        permission = operand.value
+        if kind == PERMISSION_CLASS:
+            context = get_context(request)
+            return context.has_permission(permission, request, view, obj)
+        elif kind == PERMISSION_NAME:
+            # Checked against user's permissions loaded once per request
+            return permission in get_context(request).permissions
 
-        # Get access rules for this particular request method.
-        http_method_access_rules = access_rules.get(request.method, {})
+    @classmethod
+    def eval_permissions(cls, permissions, request, view, obj=None):
+        # Operands repeated in different branches are evaluated once
+        values = {}
 
-        default_permissions = '__any__'
+        def resolve(operand):
+            if operand not in values:
+                values[operand] = cls.eval_permission(operand, request, view, obj)
+            return values[operand]
+        return permissions.evaluate(trace(request, permissions, resolve))
 
-        if view.action in ['list', 'retrieve']:
-            # Get access rules for list/retrieve action
-            http_method_access_rules = http_method_access_rules.get(
-                view.action, {'permissions': default_permissions}
-            )
+    @classmethod
+    async def aeval_permission(cls, operand, request, view, obj=None):
+        from asgiref.sync import sync_to_async
+        kind = operand.kind
+        permission = operand.value
+        if kind == PERMISSION_CLASS:
+            context = get_context(request)
+            return await context.ahas_permission(permission, request, view, obj)
+        elif kind == PERMISSION_NAME:
+            permissions = get_context(request).permissions
+            await permissions.aload()
+            if permissions.complete:
+                return permission in permissions
+            return await sync_to_async(permissions.__contains__)(permission)
+
+    @classmethod
+    async def aeval_permissions(cls, permissions, request, view, obj=None):
+        """
+        Evaluate permissions without blocking, operands of `or` are
+        evaluated concurrently.
+        """
+        values = {}
+
+        async def resolve(operand):
+            if operand not in values:
+                values[operand] = await cls.aeval_permission(operand, request, view, obj)
+            return values[operand]
+        return await permissions.aevaluate(resolve)
+
+    @classmethod
+    def eval_objects_permissions(cls, permissions, request, view, objs):
+        """
+        Evaluate object level permissions for a list of objects, operands
+        which don't depend on objects are evaluated only once.
+        """
+        def resolve(operand):
+            if operand.kind != PERMISSION_CLASS:
+                return cls.eval_permission(operand, request, view)
+            if not overrides_object_permission(operand.value):
+                return True
+            # Depends on objects
+            return None
+
+        def resolve_batch(operand, objs):
+            context = get_context(request)
+            return context.has_objects_permission(operand.value, request, view, objs)
+
+        permissions = permissions.partial(resolve)
+        return permissions.evaluate_batch(objs, resolve_batch)
 
-        return http_method_access_rules.get('permissions', default_permissions)
+    @staticmethod
+    def get_permissions(request, view):
+        # Get access rules for this particular request method and action
+        rules = get_access_plan(view).get_rules(request.method, view.action)
+        return rules.get('permissions', '__any__')
 
+    @instrument('has_permission')
     def has_permission(self, request, view):
-        required_permissions = self.get_permissions(request, view)
-        return self.has_required_permissions(required_permissions, request, view)
+        context = get_context(request)
+        plan, rule = context.get_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('permissions', 'has_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return context.verdict(
+            ('permissions', rule.permissions), None,
+            lambda: cached_decision(
+                self, request, view, rule,
+                lambda: self.eval_permissions(rule.permissions, request, view)
+            ),
+            rule.memoizable
+        )
 
+    @instrument('has_object_permission')
     def has_object_permission(self, request, view, obj):
-        required_permissions = self.get_permissions(request, view)
-        return self.has_required_permissions(required_permissions, request, view, obj)
+        context = get_context(request)
+        plan, rule = context.get_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('permissions', 'has_object_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return context.verdict(
+            ('permissions', rule.permissions), obj,
+            lambda: self.eval_permissions(rule.permissions, request, view, obj),
+            rule.memoizable
+        )
+
+    @instrument('has_permission')
+    async def ahas_permission(self, request, view):
+        """
+        Async version of `has_permission`.
+        """
+        context = get_context(request)
+        plan, rule = await context.aget_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('permissions', 'has_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return await context.averdict(
+            ('permissions', rule.permissions), None,
+            lambda: acached_decision(
+                self, request, view, rule,
+                lambda: self.aeval_permissions(rule.permissions, request, view)
+            ),
+            rule.memoizable
+        )
+
+    @instrument('has_object_permission')
+    async def ahas_object_permission(self, request, view, obj):
+        """
+        Async version of `has_object_permission`.
+        """
+        context = get_context(request)
+        plan, rule = await context.aget_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('permissions', 'has_object_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return await context.averdict(
+            ('permissions', rule.permissions), obj,
+            lambda: self.aeval_permissions(rule.permissions, request, view, obj),
+            rule.memoizable
+        )
+
+    def filter_permitted(self, request, view, objs):
+        """
+        Return objects from `objs` which pass `has_object_permission`.
+        """
+        objs = list(objs)
+        plan, rule = get_context(request).get_rule(view, request.method, view.action)
+        results = self.eval_objects_permissions(rule.permissions, request, view, objs)
+        return [obj for obj, result in zip(objs, results) if result]
 
 
 class HasRequiredAccessRules(permissions.BasePermission):
@@ -171,48 +410,158 @@ class HasRequiredAccessRules(permissions.BasePermission):
 
     @classmethod
     def eval_groups_and_perms_expr(cls, groups_and_perms_expr, groups_and_perms):
-        reducer = Reducer()
-        return reducer((
-            cls.get_operator_or_operand_value(operator_or_operand, groups_and_perms)
-            for operator_or_operand in groups_and_perms_expr
-        ))
+        expression = compile_groups_and_perms_expr(groups_and_perms_expr)
+        evaluators = {
+            operand: (lambda value=value: value)
+            for operand, value in groups_and_perms.items()
+        }
+        return cls.eval_expression(expression, evaluators)
+
+    @staticmethod
+    def eval_expression(expression, evaluators, request=None):
+        """
+        Evaluate groups & permissions expression, `evaluators` maps each
+        operand to a callable which is called only if the expression
+        needs the operand's value and at most once.
+        """
+        values = {}
+
+        def resolve(operand):
+            name = operand.value
+            if name not in values:
+                values[name] = evaluators[name]()
+            return values[name]
+        return expression.evaluate(trace(request, expression, resolve))
+
+    @staticmethod
+    async def aeval_expression(expression, evaluators):
+        """
+        Async version of `eval_expression`, `evaluators` map operands
+        to coroutine functions.
+        """
+        values = {}
+
+        async def resolve(operand):
+            name = operand.value
+            if name not in values:
+                values[name] = await evaluators[name]()
+            return values[name]
+        return await expression.aevaluate(resolve)
 
     @staticmethod
     def get_groups_and_perms_expr(request, view):
-        # Get a mapping of methods -> access rules
-        access_rules = getattr(view, "access_rules", {})
+        # Get access rules for this particular request method and action
+        rules = get_access_plan(view).get_rules(request.method, view.action)
+        return rules.get('expression', ['groups', 'permissions'])
 
-        # Get access rules for this particular request method.
-        http_method_access_rules = access_rules.get(request.method, {})
+    @instrument('has_permission')
+    def has_permission(self, request, view):
+        groups_and_perms = {
+            'groups': lambda: HasRequiredGroups().has_permission(request, view),
+            'permissions': lambda: HasRequiredPermissions().has_permission(request, view)
+        }
 
-        default_groups_and_perms_expr = ['groups', 'permissions']
+        context = get_context(request)
+        plan, rule = context.get_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('expression', 'has_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return context.verdict(
+            ('has_permission', rule), None,
+            lambda: cached_decision(
+                self, request, view, rule,
+                lambda: self.eval_expression(rule.expression, groups_and_perms, request)
+            ),
+            rule.memoizable
+        )
 
-        if view.action in ['list', 'retrieve']:
-            # Get access rules for list/retrieve action
-            http_method_access_rules = http_method_access_rules.get(
-                view.action,
-                {'expression': default_groups_and_perms_expr}
-            )
+    @instrument('has_object_permission')
+    def has_object_permission(self, request, view, obj):
+        groups_and_perms = {
+            'groups': lambda: HasRequiredGroups().has_object_permission(request, view, obj),
+            'permissions': lambda: HasRequiredPermissions().has_object_permission(request, view, obj)
+        }
 
-        return http_method_access_rules.get(
-            'expression',
-            default_groups_and_perms_expr
+        context = get_context(request)
+        plan, rule = context.get_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('expression', 'has_object_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return context.verdict(
+            ('has_object_permission', rule), obj,
+            lambda: self.eval_expression(rule.expression, groups_and_perms, request),
+            rule.memoizable
         )
 
-    def has_permission(self, request, view):
+    @instrument('has_permission')
+    async def ahas_permission(self, request, view):
+        """
+        Async version of `has_permission`.
+        """
         groups_and_perms = {
-            'groups': HasRequiredGroups().has_permission(request, view),
-            'permissions': HasRequiredPermissions().has_permission(request, view)
+            'groups': lambda: HasRequiredGroups().ahas_permission(request, view),
+            'permissions': lambda: HasRequiredPermissions().ahas_permission(request, view)
         }
 
-        groups_and_perms_expr = self.get_groups_and_perms_expr(request, view)
-        return self.eval_groups_and_perms_expr(groups_and_perms_expr, groups_and_perms)
+        context = get_context(request)
+        plan, rule = await context.aget_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('expression', 'has_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return await context.averdict(
+            ('has_permission', rule), None,
+            lambda: acached_decision(
+                self, request, view, rule,
+                lambda: self.aeval_expression(rule.expression, groups_and_perms)
+            ),
+            rule.memoizable
+        )
 
-    def has_object_permission(self, request, view, obj):
+    @instrument('has_object_permission')
+    async def ahas_object_permission(self, request, view, obj):
+        """
+        Async version of `has_object_permission`.
+        """
         groups_and_perms = {
-            'groups': HasRequiredGroups().has_object_permission(request, view, obj),
-            'permissions': HasRequiredPermissions().has_object_permission(request, view, obj)
+            'groups': lambda: HasRequiredGroups().ahas_object_permission(request, view, obj),
+            'permissions': lambda: HasRequiredPermissions().ahas_object_permission(
+                request, view, obj
+            )
         }
 
-        groups_and_perms_expr = self.get_groups_and_perms_expr(request, view)
-        return self.eval_groups_and_perms_expr(groups_and_perms_expr, groups_and_perms)
+        context = get_context(request)
+        plan, rule = await context.aget_rule(view, request.method, view.action)
+        verdict = rule.get_verdict('expression', 'has_object_permission', context.user)
+        if verdict is not None:
+            return verdict
+        return await context.averdict(
+            ('has_object_permission', rule), obj,
+            lambda: self.aeval_expression(rule.expression, groups_and_perms),
+            rule.memoizable
+        )
+
+    def filter_permitted(self, request, view, objs):
+        """
+        Return objects from `objs` which pass `has_object_permission`.
+        """
+        objs = list(objs)
+        plan, rule = get_context(request).get_rule(view, request.method, view.action)
+
+        object_roles = rule.object_roles and view.action != 'list'
+
+        def resolve(operand):
+            if operand.value == 'groups' and not object_roles:
+                return HasRequiredGroups().has_object_permission(request, view, None)
+            # Depends on objects
+            return None
+
+        def resolve_batch(operand, objs):
+            if operand.value == 'groups':
+                return HasRequiredGroups.eval_objects_groups(rule.groups, request, objs)
+            return HasRequiredPermissions.eval_objects_permissions(
+                rule.permissions, request, view, objs
+            )
+
+        expression = rule.expression.partial(resolve)
+        results = expression.evaluate_batch(objs, resolve_batch)
+        return [obj for obj, result in zip(objs, results) if result]
@@ -0,0 +1,89 @@
+from django.apps import apps
+from django.db.models import Q
+
+
+class MembershipLookup():
+    """
+    Base class of lookups of user's roles on objects, e.g roles of
+    users on projects stored in a membership table.
+    """
+    def get_roles(self, user, objs):
+        """
+        Return a set of user's roles for each object of `objs`, it's
+        called once for all objects being checked.
+        """
+        raise NotImplementedError('`get_roles()` must be implemented.')
+
+    def object_filter(self, user, role):
+        """
+        Return a `Q` object(or a boolean) matching objects on which the
+        user has `role`, used by `AccessRulesFilter`.
+        """
+        raise NotImplementedError('`object_filter()` must be implemented.')
+
+
+class ModelMembershipLookup(MembershipLookup):
+    """
+    Lookup of roles stored in a model with user, object and role fields.
+    """
+    def __init__(self, model, object_field, user_field='user', role_field='role'):
+        self.model = model
+        self.object_field = object_field
+        self.user_field = user_field
+        self.role_field = role_field
+
+    def get_model(self):
+        if isinstance(self.model, str):
+            return apps.get_model(self.model)
+        return self.model
+
+    def get_queryset(self, user):
+        return self.get_model()._default_manager.filter(**{self.user_field: user})
+
+    def get_roles(self, user, objs):
+        if user is None or not user.is_authenticated or not objs:
+            return [frozenset() for obj in objs]
+
+        memberships = self.get_queryset(user).filter(**{
+            '%s__in' % self.object_field: {obj.pk for obj in objs}
+        }).values_list(self.object_field, self.role_field)
+
+        roles = {}
+        for object_pk, role in memberships:
+            roles.setdefault(object_pk, set()).add(role)
+        return [frozenset(roles.get(obj.pk, ())) for obj in objs]
+
+    def object_filter(self, user, role):
+        if user is None or not user.is_authenticated:
+            return False
+        memberships = self.get_queryset(user).filter(**{self.role_field: role})
+        return Q(pk__in=memberships.values(self.object_field))
+
+
+class ObjectRole():
+    """
+    Group operand which passes if the user has `role` on the object
+    being checked, roles are found with a `MembershipLookup`.
+
+    Object roles are checked in `has_object_permission`, like DRF object
+    level permissions they pass in `has_permission` when the rest of the
+    groups don't decide the result.
+    """
+    def __init__(self, role, lookup):
+        self.role = role
+        self.lookup = lookup
+
+    def __eq__(self, other):
+        return (
+            type(self) is type(other) and
+            self.role == other.role and self.lookup is other.lookup
+        )
+
+    def __hash__(self):
+        return hash((type(self), self.role, id(self.lookup)))
+
+    def __str__(self):
+        return 'object:%s' % self.role
+
+    def __repr__(self):
+        return 'ObjectRole(%r, %r)' % (self.role, self.lookup)
@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .compiler import AccessPlan
+from .settings import get_setting
+
+
+logger = logging.getLogger('drf_guard')
+
+
+def get_view_path(view_class):
+    return '%s.%s' % (view_class.__module__, view_class.__qualname__)
+
+
+def get_parser(path):
+    """
+    Return a function which parses access rules file and exceptions it
+    raises on invalid content, the format is picked by file extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        return json.loads, ValueError
+
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            msg = "PyYAML is required to load access rules from `%s`." % path
+            raise ImproperlyConfigured(msg)
+        return (lambda content: yaml.safe_load(content) or {}), (yaml.YAMLError, ValueError)
+
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                msg = "tomli is required to load access rules from `%s`." % path
+                raise ImproperlyConfigured(msg)
+        return tomllib.loads, (tomllib.TOMLDecodeError, ValueError)
+
+    msg = (
+        "`%s` is not a supported access rules file, use a `.json`, "
+        "`.yaml`, `.yml` or `.toml` file."
+    ) % path
+    raise ImproperlyConfigured(msg)
+
+
+def parse_rules(path, content):
+    """
+    Parse JSON, YAML or TOML access rules file, syntax errors are
+    raised as `ImproperlyConfigured`.
+    """
+    loads, errors = get_parser(path)
+    try:
+        return loads(content)
+    except errors as e:
+        msg = "Failed to parse access rules file `%s`: %s" % (path, e)
+        raise ImproperlyConfigured(msg)
+
+
+class AccessRulesFile():
+    """
+    Access rules of views loaded from a file which maps view paths
+    (`module.ViewClass`) to their `access_rules`.
+
+    The file is checked for changes at most once every `interval`
+    seconds, only views whose rules changed are recompiled and the
+    new plans replace the old ones at once, readers never lock and
+    requests in flight keep the plans they started with.
+    """
+    def __init__(self, path, interval=None):
+        self.path = path
+        self.interval = interval
+        self.plans = {}
+        self.mtime = None
+        self.checked = None
+        self._lock = threading.Lock()
+        self.reload(os.stat(path).st_mtime_ns)
+
+    def load(self):
+        with open(self.path, encoding='utf-8') as f:
+            rules = parse_rules(self.path, f.read())
+        if not isinstance(rules, dict):
+            msg = "Access rules file `%s` must map view paths to access rules." % self.path
+            raise ImproperlyConfigured(msg)
+        return rules
+
+    def compile(self, rules):
+        old_plans = self.plans
+        plans = {}
+        for view_path, access_rules in rules.items():
+            plan = old_plans.get(view_path)
+            if plan is not None and plan.access_rules == access_rules:
+                # Unchanged rules keep their compiled plan
+                plans[view_path] = plan
+                continue
+            try:
+                plans[view_path] = AccessPlan(access_rules)
+            except (TypeError, AttributeError) as e:
+                msg = "Invalid access rules of `%s` in `%s`: %s" % (view_path, self.path, e)
+                raise ImproperlyConfigured(msg)
+        return plans
+
+    def reload(self, mtime):
+        plans = self.compile(self.load())
+        # Swapped at once, readers see either old or new plans
+        self.plans = plans
+        self.mtime = mtime
+        self.checked = time.monotonic()
+
+    def refresh(self):
+        """
+        Reload the file if it has changed, errors are logged and old
+        plans are kept.
+        """
+        if self.interval is None:
+            return
+        if time.monotonic() - self.checked < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            # Another thread is checking the file
+            return
+        mtime = None
+        try:
+            self.checked = time.monotonic()
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self.mtime:
+                self.reload(mtime)
+        except (OSError, ValueError, ImproperlyConfigured):
+            logger.exception("Failed to reload access rules from `%s`.", self.path)
+            if mtime is not None:
+                # Not retried until the file changes again
+                self.mtime = mtime
+        finally:
+            self._lock.release()
+
+    def get_plan(self, view_class):
+        self.refresh()
+        return self.plans.get(get_view_path(view_class))
+
+
+_rules_file = None
+
+
+def get_rules_file():
+    """
+    Return access rules file from `ACCESS_RULES_FILE` setting, `None`
+    if it's not set.
+    """
+    global _rules_file
+    path = get_setting('ACCESS_RULES_FILE')
+    if path is None:
+        return None
+
+    rules_file = _rules_file
+    if rules_file is None or rules_file.path != path:
+        try:
+            rules_file = AccessRulesFile(
+                path, get_setting('ACCESS_RULES_FILE_RELOAD_INTERVAL')
+            )
+        except (OSError, ValueError) as e:
+            msg = "Failed to load access rules from `%s`: %s" % (path, e)
+            raise ImproperlyConfigured(msg)
+        _rules_file = rules_file
+    return rules_file
+
+
+def get_file_plan(view_class):
+    """
+    Return compiled rules of a view from access rules file, `None` if
+    the file has no rules for the view.
+    """
+    rules_file = get_rules_file()
+    if rules_file is None:
+        return None
+    return rules_file.get_plan(view_class)
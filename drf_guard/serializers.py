@@ -0,0 +1,188 @@
+from django.db import models
+from rest_framework import serializers
+
+from .compiler import (
+    ANY, DEFAULT_EXPRESSION, GROUP, OBJECT_ROLE, PERMISSION_CLASS, PERMISSION_NAME, Constant,
+    compile_groups, compile_groups_and_perms_expr, compile_permissions,
+    optimize, reorder, substitute
+)
+from .context import get_context
+from .permissions import overrides_object_permission
+
+
+class FieldRules():
+    """
+    Compiled `field_access_rules` of a serializer, groups and permissions
+    of each field are inlined into its expression.
+    """
+    def __init__(self, field_access_rules):
+        self.field_access_rules = field_access_rules
+        self.fields = {}
+        for field, rules in field_access_rules.items():
+            expression = substitute(
+                compile_groups_and_perms_expr(rules.get('expression', DEFAULT_EXPRESSION)),
+                {
+                    'groups': compile_groups(rules.get('groups', ANY)),
+                    'permissions': compile_permissions(rules.get('permissions', ANY))
+                }
+            )
+            self.fields[field] = reorder(optimize(expression))
+
+    def get_mask(self, request, view):
+        """
+        Evaluate operands which don't depend on objects, return the
+        remaining expression of each field, fields whose expressions
+        are `Constant` don't depend on objects.
+        """
+        context = get_context(request)
+
+        def resolve(operand):
+            if operand.kind == GROUP:
+                return operand.value in context.membership
+            if operand.kind == PERMISSION_NAME:
+                return operand.value in context.permissions
+            if operand.kind == PERMISSION_CLASS:
+                if overrides_object_permission(operand.value):
+                    # Depends on objects
+                    return None
+                return context.has_permission(operand.value, request, view)
+            return None
+
+        return {
+            field: expression.partial(resolve)
+            for field, expression in self.fields.items()
+        }
+
+    def get_hidden_fields(self, request, view, objs):
+        """
+        Return a set of hidden fields for each object, object level
+        permissions are evaluated for all objects at once.
+        """
+        if request is None:
+            # Fields with rules are hidden when there is no user to check
+            return [set(self.fields) for obj in objs]
+
+        context = get_context(request)
+        mask = context.verdict(
+            ('field_access_rules', self), None,
+            lambda: self.get_mask(request, view)
+        )
+
+        def resolve_batch(operand, objs):
+            if operand.kind == OBJECT_ROLE:
+                role = operand.value
+                context.prefetch_object_roles([role.lookup], objs)
+                return [context.has_object_role(role, obj) for obj in objs]
+            return context.has_objects_permission(operand.value, request, view, objs)
+
+        hidden = [set() for obj in objs]
+        for field, expression in mask.items():
+            if isinstance(expression, Constant):
+                values = [expression.value] * len(objs)
+            else:
+                values = expression.evaluate_batch(objs, resolve_batch)
+            for fields, value in zip(hidden, values):
+                if not value:
+                    fields.add(field)
+        return hidden
+
+
+_field_rules = {}
+
+
+def get_field_rules(serializer_class):
+    """
+    Return compiled `field_access_rules` of a serializer class, compile
+    them on first use.
+    """
+    field_access_rules = getattr(serializer_class, 'field_access_rules', {})
+    rules = _field_rules.get(serializer_class)
+    if rules is None or rules.field_access_rules is not field_access_rules:
+        rules = FieldRules(field_access_rules)
+        _field_rules[serializer_class] = rules
+    return rules
+
+
+class FieldAccessRulesListSerializer(serializers.ListSerializer):
+    """
+    List serializer which checks field access rules of all objects
+    at once.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        objs = list(iterable)
+        self.child.prepare_field_access(objs)
+        return super().to_representation(objs)
+
+
+_list_serializer_classes = {
+    serializers.ListSerializer: FieldAccessRulesListSerializer
+}
+
+
+def get_list_serializer_class(list_serializer_class):
+    """
+    Return a subclass of `list_serializer_class` which checks field
+    access rules of all objects at once.
+    """
+    if issubclass(list_serializer_class, FieldAccessRulesListSerializer):
+        return list_serializer_class
+    cls = _list_serializer_classes.get(list_serializer_class)
+    if cls is None:
+        cls = type(
+            list_serializer_class.__name__,
+            (FieldAccessRulesListSerializer, list_serializer_class),
+            {'__module__': list_serializer_class.__module__}
+        )
+        _list_serializer_classes[list_serializer_class] = cls
+    return cls
+
+
+class FieldAccessRulesMixin():
+    """
+    Omit fields from representation unless the user passes their
+    `field_access_rules`, which map field names to `groups`,
+    `permissions` and `expression` like rules in `access_rules`.
+
+    DRF permission classes which implement `has_object_permission` are
+    checked with the object being serialized, other classes are checked
+    with `has_permission`.
+    """
+    field_access_rules = {}
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_serializer = super().many_init(*args, **kwargs)
+        # Objects of lists are checked in batch, `Meta.list_serializer_class`
+        # is extended instead of replaced
+        list_serializer.__class__ = get_list_serializer_class(type(list_serializer))
+        return list_serializer
+
+    def get_hidden_fields(self, objs):
+        rules = get_field_rules(type(self))
+        if not rules.fields:
+            return [set() for obj in objs]
+        return rules.get_hidden_fields(
+            self.context.get('request'), self.context.get('view'), objs
+        )
+
+    def prepare_field_access(self, objs):
+        """
+        Find hidden fields of objects which are about to be serialized.
+        """
+        # Objects are kept to keep their ids from being reused
+        self._hidden_fields = (objs, {
+            id(obj): fields
+            for obj, fields in zip(objs, self.get_hidden_fields(objs))
+        })
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        prepared = getattr(self, '_hidden_fields', None)
+        if prepared is not None and id(instance) in prepared[1]:
+            hidden = prepared[1][id(instance)]
+        else:
+            hidden = self.get_hidden_fields([instance])[0]
+        for field in hidden:
+            data.pop(field, None)
+        return data
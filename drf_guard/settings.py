@@ -0,0 +1,48 @@
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Alias of the cache(from CACHES setting) used to store user's group
+    # membership across requests, `None` disables the cache.
+    'MEMBERSHIP_CACHE': None,
+    # Number of seconds group membership is cached for.
+    'MEMBERSHIP_CACHE_TIMEOUT': 300,
+    # Groups which include other groups, e.g `{'admin': ['staff']}`
+    # makes members of `admin` members of `staff` too.
+    'GROUP_HIERARCHY': {},
+    # Where `has_permission` verdicts are cached, `'memory'` for process
+    # memory, an alias of a cache from CACHES setting or `None` to disable.
+    'DECISION_CACHE': None,
+    # Maximum number of verdicts cached in process memory.
+    'DECISION_CACHE_SIZE': 1024,
+    # Number of seconds verdicts are cached for.
+    'DECISION_CACHE_TIMEOUT': 60,
+    # Compile `access_rules` of all views in the URLconf when the app is
+    # ready instead of on the first request to each view.
+    'PRECOMPILE_ACCESS_RULES': False,
+    # Path of a JSON, YAML or TOML file mapping view paths(e.g
+    # `'myapp.views.UserViewSet'`) to their access rules, rules in the
+    # file take precedence over `access_rules` of views.
+    'ACCESS_RULES_FILE': None,
+    # Minimum number of seconds between checks of access rules file for
+    # changes, `None` disables reloading.
+    'ACCESS_RULES_FILE_RELOAD_INTERVAL': 2,
+    # Record time, queries, evaluated operands and verdict of each check
+    # made by drf_guard permission classes.
+    'INSTRUMENTATION': False,
+    # Dotted path of the class which collects records of checks when
+    # instrumentation is on, `None` to only send `permission_evaluated`
+    # signal.
+    'INSTRUMENTATION_COLLECTOR': 'drf_guard.instrumentation.InMemoryCollector',
+}
+
+
+def get_setting(name):
+    """
+    Return drf_guard setting from `DRF_GUARD` dict in Django settings.
+    """
+    user_settings = getattr(settings, 'DRF_GUARD', {})
+    try:
+        return user_settings.get(name, DEFAULTS[name])
+    except KeyError:
+        raise AttributeError("`%s` is an invalid drf_guard setting." % name)
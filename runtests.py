@@ -6,7 +6,7 @@ import subprocess
 from django.core.management import execute_from_command_line
 
 
-FLAKE8_ARGS = ['drf_guard', 'tests', 'setup.py', 'runtests.py']
+FLAKE8_ARGS = ['drf_guard', 'tests', 'benchmarks', 'setup.py', 'runtests.py']
 WARNING_COLOR = '\033[93m'
 END_COLOR = '\033[0m'
 
@@ -0,0 +1,91 @@
+from django.test import SimpleTestCase
+from rest_framework.decorators import action
+from rest_framework.viewsets import ViewSet
+
+from drf_guard.checks import check_rules_structure
+from drf_guard.compiler import AccessPlan
+from drf_guard.operators import Or
+
+
+access_rules = {
+    'GET': {
+        'groups': ['a'],
+        'list': {'groups': ['b']},
+        'export': {'groups': ['c']}
+    },
+    'POST': {
+        'groups': ['d']
+    },
+    'set_password': {
+        'groups': ['e', Or, 'f']
+    },
+    'default': {
+        'groups': ['g'],
+        'retrieve': {'groups': ['h']}
+    }
+}
+
+
+class AccessPlanTests(SimpleTestCase):
+    def setUp(self):
+        self.plan = AccessPlan(access_rules)
+
+    def get_groups(self, method, action):
+        return str(self.plan.get_rule(method, action).groups)
+
+    def test_method_rules(self):
+        self.assertEqual(self.get_groups('GET', None), 'a')
+        self.assertEqual(self.get_groups('POST', 'create'), 'd')
+
+    def test_action_sub_keys(self):
+        self.assertEqual(self.get_groups('GET', 'list'), 'b')
+        self.assertEqual(self.get_groups('GET', 'export'), 'c')
+        # Rules of list/retrieve aren't inherited from their method
+        self.assertEqual(self.get_groups('GET', 'retrieve'), 'True')
+        self.assertEqual(self.get_groups('POST', 'list'), 'True')
+
+    def test_action_rules_apply_to_all_methods(self):
+        self.assertEqual(self.get_groups('POST', 'set_password'), 'e or f')
+        self.assertEqual(self.get_groups('PUT', 'set_password'), 'e or f')
+
+    def test_default_rules(self):
+        self.assertEqual(self.get_groups('PUT', 'update'), 'g')
+        self.assertEqual(self.get_groups('DELETE', 'retrieve'), 'h')
+        self.assertEqual(self.get_groups('FOO', None), 'g')
+        # Rules of unknown methods aren't indexed
+        self.assertNotIn(('FOO', None), self.plan.rules)
+
+    def test_rules_are_allowed_without_default(self):
+        plan = AccessPlan({'GET': {'groups': ['a']}})
+        self.assertEqual(str(plan.get_rule('PUT', 'update').groups), 'True')
+
+    def test_lookups_are_indexed(self):
+        rule = self.plan.get_rule('GET', 'destroy')
+        self.assertIs(self.plan.rules[('GET', 'destroy')], rule)
+        self.assertIs(self.plan.get_rule('GET', 'destroy'), self.plan.get_rule('GET', None))
+
+    def test_get_rules(self):
+        self.assertEqual(self.plan.get_rules('PATCH', 'set_password'), access_rules['set_password'])
+        self.assertEqual(self.plan.get_rules('GET', 'retrieve'), {})
+
+
+class UserViewSet(ViewSet):
+    access_rules = dict(access_rules, stats={'groups': ['a']}, unknown={})
+
+    def list(self, request):
+        pass
+
+    @action(detail=True, methods=['post'])
+    def set_password(self, request, pk=None):
+        pass
+
+    @action(detail=False)
+    def stats(self, request):
+        pass
+
+
+class CheckActionRulesTests(SimpleTestCase):
+    def test_unknown_actions(self):
+        errors = check_rules_structure(UserViewSet, UserViewSet.access_rules)
+        self.assertEqual([error.id for error in errors], ['drf_guard.W001'])
+        self.assertIn('`unknown`', errors[0].msg)
@@ -0,0 +1,67 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.operators import Or
+from drf_guard.permissions import HasRequiredAccessRules
+from tests.testapp.models import User
+
+
+class CountingPermission(BasePermission):
+    calls = 0
+
+    def has_permission(self, request, view):
+        CountingPermission.calls += 1
+        return True
+
+    def has_object_permission(self, request, view, obj):
+        CountingPermission.calls += 1
+        return True
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'groups': ['admin'],
+            'permissions': [CountingPermission],
+            'expression': ['groups', Or, 'permissions']
+        }
+    }
+
+
+class HasRequiredAccessRulesTests(TestCase):
+    def setUp(self):
+        CountingPermission.calls = 0
+        self.admin = User.objects.create(username='admin')
+        self.admin.groups.add(Group.objects.create(name='admin'))
+        self.student = User.objects.create(username='student')
+
+    def get_request(self, user):
+        request = Request(APIRequestFactory().put('/'))
+        request.user = user
+        return request
+
+    def test_permissions_are_not_evaluated_when_groups_pass(self):
+        request = self.get_request(self.admin)
+        permission = HasRequiredAccessRules()
+        self.assertTrue(permission.has_permission(request, View()))
+        self.assertTrue(permission.has_object_permission(request, View(), self.admin))
+        self.assertEqual(CountingPermission.calls, 0)
+
+    def test_permissions_are_evaluated_when_groups_fail(self):
+        request = self.get_request(self.student)
+        self.assertTrue(HasRequiredAccessRules().has_permission(request, View()))
+        self.assertEqual(CountingPermission.calls, 1)
+
+    def test_eval_groups_and_perms_expr(self):
+        expr = ['groups', Or, 'permissions']
+        self.assertTrue(HasRequiredAccessRules.eval_groups_and_perms_expr(
+            expr, {'groups': False, 'permissions': True}
+        ))
+        with self.assertRaises(TypeError):
+            HasRequiredAccessRules.eval_groups_and_perms_expr(
+                ['groups', Or, 'perms'], {'groups': False, 'permissions': True}
+            )
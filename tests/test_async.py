@@ -0,0 +1,168 @@
+import asyncio
+import random
+from unittest import skipIf
+
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.compiler import NAME, Constant, Operand, compile_expression
+from drf_guard.operators import And, Or, Not
+from drf_guard.permissions import (
+    HasRequiredAccessRules, HasRequiredGroups, HasRequiredPermissions
+)
+from tests.testapp.models import User
+from tests.test_compiler import random_expression
+
+try:
+    from asgiref.sync import async_to_sync
+except ImportError:
+    # Django < 3.0
+    async_to_sync = None
+
+
+class Slow(BasePermission):
+    cancelled = False
+
+    async def ahas_permission(self, request, view):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            Slow.cancelled = True
+            raise
+        return False
+
+
+class Fast(BasePermission):
+    async def ahas_permission(self, request, view):
+        await asyncio.sleep(0)
+        return True
+
+
+class IsActive(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_active
+
+
+class HasProfile(BasePermission):
+    def has_permission(self, request, view):
+        # Users without profiles aren't active
+        return request.user.profile.is_complete
+
+    async def ahas_permission(self, request, view):
+        return self.has_permission(request, view)
+
+
+class Broken(BasePermission):
+    async def ahas_permission(self, request, view):
+        raise ValueError()
+
+
+class Late(BasePermission):
+    async def ahas_permission(self, request, view):
+        await asyncio.sleep(0.01)
+        return True
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'groups': ['admin', Or, 'staff'],
+            'permissions': [IsActive, And, Not, 'testapp.delete_user'],
+            'expression': ['groups', And, 'permissions']
+        },
+        'PATCH': {
+            'permissions': [Slow, Or, Fast],
+            'reorder': False
+        },
+        'POST': {
+            'permissions': [IsActive, And, HasProfile]
+        },
+        'DELETE': {
+            'permissions': [Broken, Or, Late],
+            'reorder': False
+        }
+    }
+
+
+@skipIf(async_to_sync is None, "asgiref is required by async checks.")
+class AsyncEvaluationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='admin')
+        self.user.groups.add(Group.objects.create(name='admin'))
+
+    def get_request(self, method='put'):
+        request = Request(getattr(APIRequestFactory(), method)('/'))
+        request.user = User.objects.get(pk=self.user.pk)
+        return request
+
+    def test_aevaluate_matches_evaluate(self):
+        async def resolve(operand):
+            await asyncio.sleep(0)
+            return operand.value
+
+        rng = random.Random(0)
+        for _ in range(200):
+            expression = random_expression(rng)
+            compiled = compile_expression(expression, lambda value: Operand(value, NAME))
+            self.assertEqual(
+                async_to_sync(compiled.aevaluate)(resolve),
+                compiled.evaluate(lambda operand: operand.value),
+                msg=repr(expression)
+            )
+
+    def test_constant(self):
+        self.assertTrue(async_to_sync(Constant(True).aevaluate)(None))
+
+    def test_or_resolves_on_first_true(self):
+        Slow.cancelled = False
+        request = self.get_request('patch')
+        permission = HasRequiredPermissions()
+
+        async def check():
+            result = await asyncio.wait_for(permission.ahas_permission(request, View()), 1)
+            await asyncio.sleep(0)
+            return result
+        self.assertTrue(async_to_sync(check)())
+        self.assertTrue(Slow.cancelled)
+
+    def test_permission_classes(self):
+        request = self.get_request()
+        view = View()
+        for permission in [HasRequiredGroups, HasRequiredPermissions, HasRequiredAccessRules]:
+            self.assertTrue(async_to_sync(permission().ahas_permission)(request, view))
+            self.assertTrue(async_to_sync(permission().ahas_object_permission)(
+                request, view, request.user
+            ))
+
+    def test_denied(self):
+        self.user.groups.clear()
+        request = self.get_request()
+        self.assertFalse(async_to_sync(HasRequiredAccessRules().ahas_permission)(request, View()))
+        self.assertFalse(async_to_sync(HasRequiredGroups().ahas_permission)(request, View()))
+
+    def test_and_evaluates_in_order(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(HasRequiredPermissions().has_permission(self.get_request('post'), View()))
+        self.assertFalse(async_to_sync(HasRequiredPermissions().ahas_permission)(
+            self.get_request('post'), View()
+        ))
+
+    def test_or_errors_are_raised_unless_a_child_passes(self):
+        request = self.get_request('delete')
+        self.assertTrue(async_to_sync(HasRequiredPermissions().ahas_permission)(request, View()))
+
+        async def resolve(operand):
+            if operand.value == 'broken':
+                raise ValueError()
+            return operand.value == 'yes'
+
+        expression = compile_expression(
+            ['broken', Or, 'no'], lambda value: Operand(value, NAME)
+        )
+        with self.assertRaises(ValueError):
+            async_to_sync(expression.aevaluate)(resolve)
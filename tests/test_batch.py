@@ -0,0 +1,74 @@
+from django.test import TestCase
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from django.contrib.auth.models import Group
+
+from drf_guard.operators import And, Or
+from drf_guard.permissions import (
+    HasRequiredAccessRules, HasRequiredGroups, HasRequiredPermissions
+)
+from tests.testapp.models import User
+from tests.testapp.permissions import IsSelfUser
+
+
+class IsEvenUser(BasePermission):
+    batches = []
+
+    def has_object_permission(self, request, view, obj):
+        raise AssertionError('`has_objects_permission` should be used')
+
+    def has_objects_permission(self, request, view, objs):
+        IsEvenUser.batches.append(len(objs))
+        return [obj.pk % 2 == 0 for obj in objs]
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'groups': ['admin', Or, 'student'],
+            'permissions': [IsAuthenticated, [IsSelfUser, Or, IsEvenUser]],
+            'expression': ['groups', And, 'permissions']
+        }
+    }
+
+
+class FilterPermittedTests(TestCase):
+    def setUp(self):
+        IsEvenUser.batches = []
+        self.users = [User.objects.create(username='user%s' % i) for i in range(10)]
+        self.user = self.users[1]
+        self.user.groups.add(Group.objects.create(name='student'))
+        self.request = Request(APIRequestFactory().put('/'))
+        self.request.user = self.user
+        self.view = View()
+
+    def expected(self, permission):
+        return [
+            obj for obj in self.users
+            if permission.has_object_permission(self.request, self.view, obj)
+        ]
+
+    def test_has_required_permissions(self):
+        permission = HasRequiredPermissions()
+        permitted = permission.filter_permitted(self.request, self.view, self.users)
+        self.assertEqual(IsEvenUser.batches, [9])
+        self.assertEqual(permitted, [
+            user for user in self.users
+            if user == self.user or user.pk % 2 == 0
+        ])
+        # Results are memoized for later object level checks
+        self.assertEqual(permitted, self.expected(permission))
+
+    def test_has_required_access_rules(self):
+        permission = HasRequiredAccessRules()
+        with self.assertNumQueries(1):
+            permitted = permission.filter_permitted(self.request, self.view, self.users)
+        self.assertEqual(permitted, self.expected(permission))
+
+    def test_has_required_groups(self):
+        permission = HasRequiredGroups()
+        self.assertEqual(permission.filter_permitted(self.request, self.view, self.users), self.users)
+        self.request.user = self.users[0]
+        self.assertEqual(permission.filter_permitted(self.request, self.view, self.users), [])
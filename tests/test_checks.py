@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.conf.urls import url
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
+
+from drf_guard import compiler
+from drf_guard.checks import (
+    check_access_rules, check_group_names, get_views, precompile_access_rules
+)
+from drf_guard.filters import AccessRulesFilter
+from drf_guard.operators import Or
+from drf_guard.permissions import HasRequiredPermissions
+from tests.testapp.models import User
+
+
+class ValidView(APIView):
+    access_rules = {
+        'GET': {
+            'list': {'groups': ['admin', Or, 'teacher']},
+            'retrieve': {'groups': '__any__'}
+        }
+    }
+
+
+class InvalidOperandView(APIView):
+    access_rules = {'GET': {'groups': ['admin', Or]}}
+
+
+class CodenameView(APIView):
+    access_rules = {'GET': {'permissions': ['testapp.view_user', Or, 'change_user']}}
+
+
+class InvalidStructureView(APIView):
+    access_rules = {'get': {'group': ['admin']}, 'PUT': []}
+
+
+class PermissionObjectView(APIView):
+    access_rules = {}
+
+
+class IsOwner(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return obj == request.user
+
+
+class UnfilterableView(APIView):
+    filter_backends = (AccessRulesFilter,)
+    access_rules = {'GET': {'retrieve': {'permissions': [IsOwner]}}}
+
+
+urlpatterns = [
+    url('^valid/$', ValidView.as_view()),
+    url('^invalid-operand/$', InvalidOperandView.as_view()),
+    url('^invalid-structure/$', InvalidStructureView.as_view()),
+    url('^unfilterable/$', UnfilterableView.as_view()),
+    url('^permission-object/$', PermissionObjectView.as_view()),
+    url('^codename/$', CodenameView.as_view()),
+]
+
+
+@override_settings(ROOT_URLCONF='tests.test_checks')
+class ChecksTests(TestCase):
+    def test_get_views(self):
+        self.assertEqual(
+            get_views(),
+            [
+                ValidView, InvalidOperandView, InvalidStructureView, UnfilterableView,
+                PermissionObjectView, CodenameView
+            ]
+        )
+
+    def test_check_access_rules(self):
+        errors = check_access_rules()
+        self.assertEqual(
+            [(error.id, error.obj) for error in errors],
+            [
+                ('drf_guard.E002', InvalidOperandView),
+                ('drf_guard.W001', InvalidStructureView),
+                ('drf_guard.W002', InvalidStructureView),
+                ('drf_guard.E001', InvalidStructureView),
+                ('drf_guard.E004', UnfilterableView),
+                ('drf_guard.W005', CodenameView),
+            ]
+        )
+
+    def test_valid_views_are_precompiled(self):
+        compiler._plans.pop(ValidView, None)
+        check_access_rules()
+        self.assertIs(compiler._plans[ValidView].access_rules, ValidView.access_rules)
+
+    def test_views_with_permission_objects_are_compiled_on_first_request(self):
+        permission = Permission.objects.get(codename='change_user')
+        ContentType.objects.clear_cache()
+        compiler._plans.pop(PermissionObjectView, None)
+        access_rules = {'GET': {'permissions': [permission]}}
+        with mock.patch.object(PermissionObjectView, 'access_rules', access_rules):
+            with self.assertNumQueries(0):
+                check_access_rules()
+                precompile_access_rules()
+            self.assertNotIn(PermissionObjectView, compiler._plans)
+
+    def test_views_with_permission_objects_are_validated(self):
+        permission = Permission.objects.get(codename='change_user')
+        access_rules = {'GET': {'permissions': [permission, Or, 1]}}
+        with mock.patch.object(PermissionObjectView, 'access_rules', access_rules):
+            with self.assertNumQueries(0):
+                errors = check_access_rules()
+        self.assertIn(('drf_guard.E002', PermissionObjectView), [
+            (error.id, error.obj) for error in errors
+        ])
+
+    def test_check_group_names(self):
+        Group.objects.create(name='admin')
+        self.assertEqual(check_group_names(databases=[]), [])
+        errors = check_group_names(databases=['default'])
+        self.assertEqual([error.msg for error in errors], ["Group `teacher` does not exist."])
+
+
+class PermissionObjectsTests(TestCase):
+    def test_permission_objects_are_resolved_to_full_names(self):
+        permission = Permission.objects.get(codename='change_user')
+        operand = compiler.make_permission_operand(permission)
+        self.assertEqual(operand.value, 'testapp.change_user')
+
+        user = User.objects.create(username='user')
+        user.user_permissions.add(permission)
+        self.assertTrue(HasRequiredPermissions.has_required_permissions(
+            [permission], type('Request', (), {'user': user}), None
+        ))
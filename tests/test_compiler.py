@@ -0,0 +1,117 @@
+import random
+
+from django.test import SimpleTestCase
+
+from drf_guard.operators import And, Or, Not, Reducer
+from drf_guard.compiler import (
+    AndExpr, Constant, NotExpr, OrExpr, compile_expression,
+    compile_groups, compile_permissions, get_access_plan, make_group_operand
+)
+
+
+def make_bool_operand(value):
+    return Constant(value)
+
+
+def random_expression(rng, depth=0):
+    expression = []
+    for term_index in range(rng.randint(1, 4)):
+        if term_index:
+            expression.append(rng.choice([And, Or]))
+        for unary_index in range(rng.randint(1, 2)):
+            if not unary_index:
+                # `a, Not, b` is ambiguous in `Reducer`
+                expression.extend([Not] * rng.choice([0, 0, 1, 2]))
+            if depth < 2 and rng.random() < 0.3:
+                expression.append(random_expression(rng, depth + 1))
+            else:
+                expression.append(rng.choice([True, False]))
+    return expression
+
+
+def reducer_eval(expression):
+    return bool(Reducer()(
+        reducer_eval(item) if isinstance(item, list)
+        else item() if isinstance(item, type) else item
+        for item in expression
+    ))
+
+
+class CompilerTests(SimpleTestCase):
+    def test_matches_reducer(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            expression = random_expression(rng)
+            compiled = compile_expression(expression, make_bool_operand)
+            self.assertEqual(
+                compiled.evaluate(None), reducer_eval(expression),
+                msg=repr(expression)
+            )
+
+    def test_operators_are_right_associative(self):
+        compiled = compile_groups(['a', Or, 'b', And, Not, 'c'])
+        self.assertIsInstance(compiled, OrExpr)
+        self.assertIsInstance(compiled.children[1], AndExpr)
+        self.assertIsInstance(compiled.children[1].children[1], NotExpr)
+
+    def test_constants(self):
+        self.assertTrue(compile_groups('__any__').evaluate(None))
+        self.assertFalse(compile_groups([]).evaluate(None))
+
+    def test_shortcircuit(self):
+        evaluated = []
+
+        def resolve(operand):
+            evaluated.append(operand.value)
+            return operand.value == 'a'
+
+        compile_groups(['a', Or, 'b', And, 'c']).evaluate(resolve)
+        self.assertEqual(evaluated, ['a'])
+
+    def test_invalid_expressions(self):
+        with self.assertRaises(TypeError):
+            compile_groups(['a', Or])
+        with self.assertRaises(TypeError):
+            compile_groups([And, 'a'])
+        with self.assertRaises(TypeError):
+            compile_groups(['a', 1.5])
+        with self.assertRaises(TypeError):
+            compile_permissions(['a', object])
+
+    def test_immutable(self):
+        operand = make_group_operand('a')
+        with self.assertRaises(AttributeError):
+            operand.value = 'b'
+
+    def test_evaluate_batch_matches_evaluate(self):
+        rng = random.Random(1)
+        names = ['a', 'b', 'c', 'd']
+        for _ in range(300):
+            expression = random_expression(rng)
+            expression = compile_expression(
+                expression, lambda value: make_group_operand(rng.choice(names))
+            )
+            items = [
+                {name: rng.choice([True, False]) for name in names}
+                for _ in range(8)
+            ]
+            results = expression.evaluate_batch(
+                items, lambda operand, items: [item[operand.value] for item in items]
+            )
+            self.assertEqual(results, [
+                expression.evaluate(lambda operand: item[operand.value])
+                for item in items
+            ])
+
+    def test_partial(self):
+        expression = compile_groups(['a', Or, 'b', And, 'c'])
+        known = {'a': False, 'c': True}
+        partial = expression.partial(lambda operand: known.get(operand.value))
+        self.assertEqual(partial.value, 'b')
+        known = {'a': True}
+        partial = expression.partial(lambda operand: known.get(operand.value))
+        self.assertTrue(partial.evaluate(None))
+
+    def test_plans_of_views_without_rules_are_reused(self):
+        View = type('View', (), {})
+        self.assertIs(get_access_plan(View()), get_access_plan(View()))
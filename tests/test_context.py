@@ -0,0 +1,88 @@
+from django.test import TestCase
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.operators import And, Or
+from drf_guard.permissions import (
+    HasRequiredAccessRules, HasRequiredGroups, HasRequiredPermissions
+)
+from tests.testapp.models import User
+
+
+class ExpensivePermission(BasePermission):
+    calls = 0
+
+    def has_permission(self, request, view):
+        type(self).calls += 1
+        return False
+
+    def has_object_permission(self, request, view, obj):
+        type(self).calls += 1
+        return True
+
+
+class RandomPermission(ExpensivePermission):
+    drf_guard_memoize = False
+    calls = 0
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'permissions': [
+                [ExpensivePermission, Or, RandomPermission], Or,
+                [ExpensivePermission, And, RandomPermission], Or,
+                RandomPermission
+            ]
+        }
+    }
+
+
+class EvaluationContextTests(TestCase):
+    def setUp(self):
+        ExpensivePermission.calls = 0
+        RandomPermission.calls = 0
+        self.user = User.objects.create(username='user')
+        self.request = Request(APIRequestFactory().put('/'))
+        self.request.user = self.user
+
+    def test_permission_results_are_memoized(self):
+        view = View()
+        HasRequiredPermissions().has_permission(self.request, view)
+        HasRequiredAccessRules().has_permission(self.request, view)
+        self.assertEqual(ExpensivePermission.calls, 1)
+        self.assertEqual(RandomPermission.calls, 4)
+
+    def test_results_are_memoized_per_object(self):
+        view = View()
+        for obj in [self.user, self.user, View()]:
+            HasRequiredPermissions().has_object_permission(self.request, view, obj)
+        self.assertEqual(ExpensivePermission.calls, 2)
+
+    def test_results_are_not_shared_between_requests(self):
+        request = Request(APIRequestFactory().put('/'))
+        request.user = self.user
+        HasRequiredPermissions().has_permission(self.request, View())
+        HasRequiredPermissions().has_permission(request, View())
+        self.assertEqual(ExpensivePermission.calls, 2)
+
+    def test_verdicts_are_shared_between_classes_and_phases(self):
+        class SharedView():
+            action = 'update'
+            access_rules = {
+                'PUT': {
+                    'groups': ['admin'],
+                    'permissions': [ExpensivePermission, Or, 'testapp.change_user']
+                }
+            }
+
+        view = SharedView()
+        # Groups and permissions(two queries) are loaded once
+        with self.assertNumQueries(3):
+            for permission in [HasRequiredGroups, HasRequiredPermissions, HasRequiredAccessRules]:
+                permission().has_permission(self.request, view)
+                permission().has_object_permission(self.request, view, self.user)
+        # Once per phase
+        self.assertEqual(ExpensivePermission.calls, 2)
@@ -0,0 +1,130 @@
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase, override_settings
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.compiler import AccessPlan
+from drf_guard.decisions import MemoryDecisionCache, get_decision_cache, get_decision_key
+from drf_guard.permissions import HasRequiredAccessRules, HasRequiredPermissions
+from tests.testapp.models import User
+
+
+class IsActive(BasePermission):
+    calls = 0
+
+    def has_permission(self, request, view):
+        IsActive.calls += 1
+        return request.user.is_active
+
+
+class HasToken(BasePermission):
+    drf_guard_cacheable = False
+    calls = 0
+
+    def has_permission(self, request, view):
+        HasToken.calls += 1
+        return 'token' in request.query_params
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {'groups': ['admin'], 'permissions': [IsActive]},
+        'PATCH': {'permissions': [IsActive, HasToken]},
+        'POST': {'permissions': ['testapp.change_user']},
+        'DELETE': {'permissions': [IsAdminUser]}
+    }
+
+
+@override_settings(DRF_GUARD={'DECISION_CACHE': 'memory'})
+class DecisionCacheTests(TestCase):
+    def setUp(self):
+        get_decision_cache().clear()
+        IsActive.calls = 0
+        HasToken.calls = 0
+        self.user = User.objects.create(username='admin')
+        self.user.groups.add(Group.objects.create(name='admin'))
+
+    def get_request(self, method='put', user=None):
+        request = Request(getattr(APIRequestFactory(), method)('/?token=1'))
+        request.user = user or self.user
+        return request
+
+    def check(self, permission, method='put', user=None):
+        return permission.has_permission(self.get_request(method, user), View())
+
+    def test_decisions_are_cached_across_requests(self):
+        cache = get_decision_cache()
+        self.assertTrue(self.check(HasRequiredAccessRules()))
+        with self.assertNumQueries(1):
+            # Only user's groups are fetched
+            self.assertTrue(self.check(HasRequiredAccessRules()))
+        self.assertEqual(IsActive.calls, 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 3})
+
+    @override_settings(DRF_GUARD={'DECISION_CACHE': 'default'})
+    def test_django_cache_backend(self):
+        self.assertTrue(self.check(HasRequiredPermissions()))
+        self.assertTrue(self.check(HasRequiredPermissions()))
+        self.assertEqual(IsActive.calls, 1)
+
+    def test_uncacheable_rules(self):
+        self.check(HasRequiredPermissions(), 'patch')
+        self.check(HasRequiredPermissions(), 'patch')
+        self.assertEqual(HasToken.calls, 2)
+
+    def test_cache_is_keyed_by_user_groups(self):
+        self.assertTrue(self.check(HasRequiredAccessRules()))
+        user = User.objects.create(username='student')
+        self.assertFalse(self.check(HasRequiredAccessRules(), user=user))
+
+    def reload_user(self):
+        # Users are fetched by each request
+        return User.objects.get(pk=self.user.pk)
+
+    def test_revoked_permissions_are_denied(self):
+        permission = Permission.objects.get(codename='change_user')
+        self.user.user_permissions.add(permission)
+        self.assertTrue(self.check(HasRequiredPermissions(), 'post', self.reload_user()))
+        self.user.user_permissions.remove(permission)
+        self.assertFalse(self.check(HasRequiredPermissions(), 'post', self.reload_user()))
+
+    def test_cache_is_keyed_by_user_flags(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.assertTrue(self.check(HasRequiredPermissions(), 'delete', self.reload_user()))
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        self.assertFalse(self.check(HasRequiredPermissions(), 'delete', self.reload_user()))
+
+    def test_cache_is_keyed_by_compiled_rules(self):
+        request = self.get_request()
+
+        def get_key(access_rules):
+            rule = AccessPlan(access_rules).get_rule('PUT', 'update')
+            return get_decision_key(HasRequiredPermissions(), request, View(), rule)
+        # Keys don't depend on the order plans are compiled in
+        self.assertEqual(get_key(View.access_rules), get_key(dict(View.access_rules)))
+        self.assertNotEqual(
+            get_key(View.access_rules), get_key({'PUT': {'permissions': [IsAdminUser]}})
+        )
+
+    @override_settings(DRF_GUARD={})
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_decision_cache())
+
+
+class MemoryDecisionCacheTests(TestCase):
+    def test_lru_eviction(self):
+        cache = MemoryDecisionCache(max_size=2, timeout=60)
+        cache.set('a', True)
+        cache.set('b', True)
+        cache.get('a')
+        cache.set('c', False)
+        self.assertIsNone(cache.get('b'))
+        self.assertTrue(cache.get('a'))
+        self.assertFalse(cache.get('c'))
+
+    def test_expiry(self):
+        cache = MemoryDecisionCache(max_size=2, timeout=-1)
+        cache.set('a', True)
+        self.assertIsNone(cache.get('a'))
@@ -0,0 +1,71 @@
+from django.db.models import Q
+from django.urls import reverse_lazy
+from rest_framework.permissions import BasePermission
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import Group
+
+from drf_guard.compiler import Constant, compile_expression, make_group_operand
+from drf_guard.filters import AccessRulesFilter, to_condition
+from drf_guard.operators import And, Or, Not
+from tests.testapp.models import User
+
+
+class AccessRulesFilterTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', password='adminuser')
+        self.student = User.objects.create(username='student', password='studentuser')
+        self.teacher = User.objects.create(username='teacher', password='teacheruser')
+
+        self.admin.groups.add(Group.objects.create(name='admin'))
+        self.student.groups.add(Group.objects.create(name='student'))
+        self.teacher.groups.add(Group.objects.create(name='teacher'))
+
+    def list_usernames(self, user):
+        url = reverse_lazy("filtered-user-list")
+        self.client.force_authenticate(user=user)
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, 200)
+        return [user['username'] for user in response.data]
+
+    def test_list_with_admin(self):
+        self.assertEqual(self.list_usernames(self.admin), ['admin', 'student', 'teacher'])
+
+    def test_list_with_student(self):
+        self.assertEqual(self.list_usernames(self.student), ['student'])
+
+    def test_list_with_teacher(self):
+        self.assertEqual(self.list_usernames(self.teacher), ['student', 'teacher'])
+
+    def test_permission_without_filter(self):
+        class IsOwner(BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return False
+
+        class View():
+            access_rules = {'GET': {'retrieve': {'permissions': [IsOwner]}}}
+
+        request = self.client.get('/').wsgi_request
+        # Reported by system checks, objects are hidden at request time
+        with self.assertLogs('drf_guard', 'ERROR'):
+            self.assertFalse(AccessRulesFilter().get_condition(request, View()))
+
+
+class ToConditionTests(APITestCase):
+    def convert(self, expression):
+        def make_operand(value):
+            if isinstance(value, bool):
+                return Constant(value)
+            return make_group_operand(value)
+
+        def resolve(operand):
+            return Q(name=operand.value)
+
+        compiled = compile_expression(expression, make_operand)
+        return to_condition(compiled, resolve)
+
+    def test_constants_are_folded(self):
+        self.assertEqual(self.convert(['a', Or, True]), True)
+        self.assertEqual(self.convert(['a', And, False]), False)
+        self.assertEqual(self.convert(['a', And, True]), Q(name='a'))
+        self.assertEqual(self.convert(['a', Or, 'b']), Q(name='a') | Q(name='b'))
+        self.assertEqual(self.convert([Not, 'a']), ~Q(name='a'))
@@ -0,0 +1,131 @@
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.instrumentation import get_collector, permission_evaluated
+from drf_guard.operators import Or
+from drf_guard.permissions import HasRequiredAccessRules, HasRequiredGroups
+from tests.testapp.models import User
+
+try:
+    from asgiref.sync import async_to_sync
+except ImportError:
+    # Django < 3.0
+    async_to_sync = None
+
+
+class IsActive(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_active
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.is_active
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'groups': ['admin', Or, 'staff'],
+            'permissions': [IsActive],
+            'expression': ['groups', Or, 'permissions'],
+            'reorder': False
+        }
+    }
+
+
+@override_settings(DRF_GUARD={'INSTRUMENTATION': True})
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        get_collector().clear()
+        self.user = User.objects.create(username='admin')
+        self.user.groups.add(Group.objects.create(name='admin'))
+        self.evaluations = []
+        permission_evaluated.connect(self.receive)
+
+    def tearDown(self):
+        permission_evaluated.disconnect(self.receive)
+
+    def receive(self, sender, evaluation, **kwargs):
+        self.evaluations.append(evaluation)
+
+    def get_request(self):
+        request = Request(APIRequestFactory().put('/'))
+        request.user = self.user
+        return request
+
+    def test_evaluation_is_recorded(self):
+        self.assertTrue(HasRequiredGroups().has_permission(self.get_request(), View()))
+        evaluation, = self.evaluations
+        self.assertIs(evaluation.permission, HasRequiredGroups)
+        self.assertIs(evaluation.view, View)
+        self.assertEqual(evaluation.method, 'PUT')
+        self.assertEqual(evaluation.action, 'update')
+        self.assertEqual(evaluation.phase, 'has_permission')
+        self.assertTrue(evaluation.verdict)
+        self.assertEqual(evaluation.queries, 1)
+        self.assertGreater(evaluation.duration, 0)
+        # 'staff' is short-circuited
+        self.assertEqual(evaluation.evaluated, [('admin', True)])
+        self.assertEqual(evaluation.skipped, ['staff'])
+
+    def test_nested_checks_are_recorded_separately(self):
+        permission = HasRequiredAccessRules()
+        self.assertTrue(permission.has_object_permission(self.get_request(), View(), self.user))
+        groups, access_rules = self.evaluations
+        self.assertIs(groups.permission, HasRequiredGroups)
+        self.assertIs(access_rules.permission, HasRequiredAccessRules)
+        self.assertEqual(access_rules.phase, 'has_object_permission')
+        self.assertEqual(access_rules.evaluated, [('groups', True)])
+        self.assertEqual(access_rules.skipped, ['permissions'])
+
+    def test_in_memory_collector(self):
+        HasRequiredGroups().has_permission(self.get_request(), View())
+        HasRequiredGroups().has_permission(self.get_request(), View())
+        stats = get_collector().stats()
+        entry = stats[(
+            'drf_guard.permissions.HasRequiredGroups', 'tests.test_instrumentation.View',
+            'PUT', 'update', 'has_permission'
+        )]
+        self.assertEqual(entry['count'], 2)
+        self.assertEqual(entry['allowed'], 2)
+        self.assertEqual(entry['queries'], 2)
+        self.assertEqual(entry['skipped'], 2)
+
+    def test_views_are_told_apart_by_module(self):
+        OtherView = type('View', (), {'__module__': 'tests.other', 'action': 'update'})
+        OtherView.access_rules = View.access_rules
+        HasRequiredGroups().has_permission(self.get_request(), View())
+        HasRequiredGroups().has_permission(self.get_request(), OtherView())
+        views = [key[1] for key in get_collector().stats()]
+        self.assertCountEqual(views, ['tests.test_instrumentation.View', 'tests.other.View'])
+
+    def test_queries_are_not_counted_without_execute_wrapper(self):
+        with mock.patch('drf_guard.instrumentation.can_count_queries', return_value=False):
+            HasRequiredGroups().has_permission(self.get_request(), View())
+        evaluation, = self.evaluations
+        self.assertIsNone(evaluation.queries)
+        self.assertTrue(evaluation.verdict)
+        entry, = get_collector().stats().values()
+        self.assertIsNone(entry['queries'])
+
+    @skipIf(async_to_sync is None, "asgiref is required by async checks.")
+    def test_async_checks_are_recorded(self):
+        permission = HasRequiredGroups()
+        self.assertTrue(async_to_sync(permission.ahas_permission)(self.get_request(), View()))
+        evaluation, = self.evaluations
+        self.assertIs(evaluation.permission, HasRequiredGroups)
+        self.assertEqual(evaluation.phase, 'has_permission')
+        self.assertTrue(evaluation.verdict)
+        self.assertIsNone(evaluation.queries)
+        self.assertGreater(evaluation.duration, 0)
+
+    def test_disabled(self):
+        with self.settings(DRF_GUARD={}):
+            HasRequiredGroups().has_permission(self.get_request(), View())
+        self.assertEqual(self.evaluations, [])
+        self.assertEqual(get_collector().stats(), {})
@@ -0,0 +1,285 @@
+from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.cache import get_cached_groups, set_cached_groups
+from drf_guard.groups import get_group_hierarchy, group_index
+from drf_guard.membership import GroupMembership, PermissionSet
+from drf_guard.operators import And, Or, Not
+from drf_guard.permissions import HasRequiredGroups, HasRequiredPermissions
+from tests.testapp.models import User
+
+try:
+    from django.contrib.auth.backends import BaseBackend
+except ImportError:
+    # Django < 3.0
+    BaseBackend = None
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'groups': ['admin', Or, 'client', And, Not, 'seller']
+        },
+        'PATCH': {
+            'groups': '__any__'
+        }
+    }
+
+
+class GroupMembershipTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='client')
+        self.user.groups.add(Group.objects.create(name='client'))
+        Group.objects.create(name='seller')
+
+    def get_request(self, method='put', user=None):
+        request = Request(getattr(APIRequestFactory(), method)('/'))
+        request.user = user or self.user
+        return request
+
+    def test_single_query_per_request(self):
+        request = self.get_request()
+        permission = HasRequiredGroups()
+        with self.assertNumQueries(1):
+            self.assertTrue(permission.has_permission(request, View()))
+            self.assertTrue(permission.has_object_permission(request, View(), None))
+
+    def test_no_query_for_constant_rules(self):
+        request = self.get_request('patch')
+        with self.assertNumQueries(0):
+            self.assertTrue(HasRequiredGroups().has_permission(request, View()))
+
+    def test_no_query_for_anonymous_user(self):
+        request = self.get_request(user=AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertFalse(HasRequiredGroups().has_permission(request, View()))
+
+    def test_group_objects(self):
+        client = Group.objects.get(name='client')
+        self.assertTrue(HasRequiredGroups.is_in_required_groups(self.user, [client]))
+        self.assertFalse(HasRequiredGroups.is_in_required_groups(self.user, ['seller']))
+
+    def test_group_objects_and_ids_are_checked_by_pk(self):
+        client = Group.objects.get(name='client')
+        seller = Group.objects.get(name='seller')
+        view = type('View', (), {
+            'action': 'update',
+            'access_rules': {'PUT': {'groups': [seller, Or, client.pk]}}
+        })()
+        client.name = 'buyer'
+        client.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(HasRequiredGroups().has_permission(self.get_request(), view))
+
+    def test_names_are_resolved_to_ids(self):
+        membership = GroupMembership(self.user)
+        client = Group.objects.get(name='client')
+        self.assertIn('client', membership)
+        self.assertIn(client, membership)
+        self.assertIn(client.pk, membership)
+        self.assertNotIn('seller', membership)
+        self.assertNotIn('unknown', membership)
+        self.assertEqual(group_index.get_id('client'), client.pk)
+
+
+@override_settings(DRF_GUARD={'MEMBERSHIP_CACHE': 'default'})
+class GroupMembershipCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='client')
+        self.client_group = Group.objects.create(name='client')
+        self.user.groups.add(self.client_group)
+
+    def tearDown(self):
+        cache.clear()
+
+    def is_in_group(self, group):
+        membership = GroupMembership(self.user)
+        return group in membership
+
+    def test_membership_is_cached_across_requests(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(self.is_in_group('client'))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.is_in_group('client'))
+            self.assertFalse(self.is_in_group('admin'))
+
+    def test_invalidated_when_user_groups_change(self):
+        self.assertFalse(self.is_in_group('admin'))
+        admin_group = Group.objects.create(name='admin')
+        self.user.groups.add(admin_group)
+        self.assertTrue(self.is_in_group('admin'))
+        admin_group.user_set.remove(self.user)
+        self.assertFalse(self.is_in_group('admin'))
+        self.user.groups.add(admin_group)
+        admin_group.user_set.clear()
+        self.assertFalse(self.is_in_group('admin'))
+
+    def test_late_writes_are_ignored(self):
+        # A request reads the version and fetches groups from the database
+        version, groups = get_cached_groups(cache, self.user.pk)
+        self.assertIsNone(groups)
+        stale = [(self.client_group.pk, self.client_group.name)]
+        # Then the user is removed from the group before groups are cached
+        self.user.groups.remove(self.client_group)
+        set_cached_groups(cache, self.user.pk, version, stale)
+        self.assertIsNone(get_cached_groups(cache, self.user.pk)[1])
+        self.assertFalse(self.is_in_group('client'))
+
+    def test_invalidated_when_group_is_renamed_or_deleted(self):
+        self.assertTrue(self.is_in_group('client'))
+        self.client_group.name = 'buyer'
+        self.client_group.save()
+        self.assertFalse(self.is_in_group('client'))
+        self.assertTrue(self.is_in_group('buyer'))
+        self.client_group.delete()
+        self.assertFalse(self.is_in_group('buyer'))
+
+
+class HasPermBackend():
+    """
+    Backend which can't list permissions.
+    """
+    calls = 0
+
+    def authenticate(self, request, **kwargs):
+        return None
+
+    def has_perm(self, user, perm, obj=None):
+        HasPermBackend.calls += 1
+        return perm == 'testapp.special'
+
+
+class PublishBackend(BaseBackend or object):
+    """
+    Backend which implements only `has_perm`, `get_all_permissions`
+    of `BaseBackend` doesn't list its permissions.
+    """
+    def has_perm(self, user, perm, obj=None):
+        return perm == 'testapp.publish'
+
+
+class PermissionSetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='change_user'),
+            Permission.objects.get(codename='delete_user')
+        )
+        self.view = type('View', (), {
+            'action': 'update',
+            'access_rules': {
+                'PUT': {
+                    'permissions': [
+                        'testapp.change_user', 'view_user', Or,
+                        Permission.objects.get(codename='delete_user')
+                    ]
+                }
+            }
+        })()
+
+    def get_request(self, user=None):
+        request = Request(APIRequestFactory().put('/'))
+        request.user = User.objects.get(pk=(user or self.user).pk)
+        return request
+
+    def test_names_are_loaded_once(self):
+        request = self.get_request()
+        with self.assertNumQueries(2):
+            # User's and groups' permissions
+            self.assertTrue(HasRequiredPermissions().has_permission(request, self.view))
+            self.assertTrue(HasRequiredPermissions().has_object_permission(
+                request, self.view, None
+            ))
+
+    def test_unqualified_names(self):
+        permissions = PermissionSet(self.user)
+        # Like `has_perm`, only full names match
+        self.assertNotIn('change_user', permissions)
+        self.assertIn('testapp.change_user', permissions)
+        self.assertNotIn('view_user', permissions)
+        self.assertNotIn('auth.change_user', permissions)
+
+    def test_superuser_and_inactive_users(self):
+        superuser = User.objects.create(username='admin', is_superuser=True)
+        with self.assertNumQueries(0):
+            self.assertIn('testapp.view_user', PermissionSet(superuser))
+        self.user.is_active = False
+        with self.assertNumQueries(0):
+            self.assertNotIn('testapp.change_user', PermissionSet(self.user))
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        'django.contrib.auth.backends.ModelBackend',
+        'tests.test_membership.HasPermBackend'
+    ])
+    def test_backends_without_get_all_permissions(self):
+        HasPermBackend.calls = 0
+        permissions = PermissionSet(self.user)
+        self.assertIn('testapp.change_user', permissions)
+        self.assertEqual(HasPermBackend.calls, 0)
+        self.assertIn('testapp.special', permissions)
+        self.assertNotIn('testapp.view_user', permissions)
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        'django.contrib.auth.backends.ModelBackend',
+        'tests.test_membership.PublishBackend'
+    ])
+    def test_backends_with_own_has_perm(self):
+        self.assertIn('testapp.publish', PermissionSet(self.user))
+        self.assertIn('testapp.change_user', PermissionSet(self.user))
+        self.assertNotIn('testapp.view_user', PermissionSet(self.user))
+        self.view.access_rules['PUT']['permissions'] = ['testapp.publish']
+        self.assertTrue(HasRequiredPermissions().has_permission(self.get_request(), self.view))
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        'django.contrib.auth.backends.ModelBackend',
+        'tests.test_membership.HasPermBackend'
+    ])
+    def test_backends_are_asked_for_inactive_and_anonymous_users(self):
+        self.user.is_active = False
+        self.assertIn('testapp.special', PermissionSet(self.user))
+        self.assertIn('testapp.special', PermissionSet(AnonymousUser()))
+        self.assertNotIn('testapp.change_user', PermissionSet(self.user))
+
+
+@override_settings(DRF_GUARD={'GROUP_HIERARCHY': {
+    'superadmin': ['admin'],
+    'admin': ['staff', 'support'],
+    'staff': ['admin']
+}})
+class GroupHierarchyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='superadmin')
+        self.user.groups.add(Group.objects.create(name='superadmin'))
+        self.staff = Group.objects.create(name='staff')
+
+    def test_closure(self):
+        hierarchy = get_group_hierarchy()
+        self.assertEqual(hierarchy.descendants['superadmin'], {'admin', 'staff', 'support'})
+        # Cycles make groups equivalent
+        self.assertEqual(hierarchy.descendants['staff'], {'admin', 'support'})
+        self.assertEqual(hierarchy.get_ancestors('support'), {'superadmin', 'admin', 'staff'})
+        self.assertIs(get_group_hierarchy(), hierarchy)
+
+    def test_included_groups_without_extra_queries(self):
+        request = Request(APIRequestFactory().put('/'))
+        request.user = self.user
+        view = type('View', (), {
+            'action': 'update',
+            'access_rules': {'PUT': {'groups': ['support', And, self.staff, And, Not, 'client']}}
+        })()
+        with self.assertNumQueries(1):
+            self.assertTrue(HasRequiredGroups().has_permission(request, view))
+
+    def test_is_in_group(self):
+        self.assertTrue(HasRequiredGroups.is_in_group(self.user, 'staff'))
+        self.assertTrue(HasRequiredGroups.is_in_group(self.user, self.staff))
+        self.assertFalse(HasRequiredGroups.is_in_group(self.user, 'client'))
+        with override_settings(DRF_GUARD={}):
+            self.assertFalse(HasRequiredGroups.is_in_group(self.user, 'staff'))
+            self.assertNotIn('staff', GroupMembership(self.user))
@@ -0,0 +1,72 @@
+import random
+
+from django.test import SimpleTestCase
+from rest_framework.permissions import AllowAny, BasePermission, IsAuthenticated
+
+from drf_guard.compiler import (
+    AccessPlan, Constant, compile_expression, compile_groups, compile_permissions,
+    make_group_operand, optimize
+)
+from drf_guard.operators import And, Or, Not
+from tests.test_compiler import random_expression
+
+
+class IsLucky(BasePermission):
+    drf_guard_memoize = False
+
+
+class OptimizerTests(SimpleTestCase):
+    def optimize_groups(self, groups):
+        return str(optimize(compile_groups(groups)))
+
+    def test_constants_are_folded(self):
+        self.assertEqual(str(optimize(compile_permissions([IsAuthenticated, Or, AllowAny]))), 'True')
+        self.assertEqual(
+            str(optimize(compile_permissions([IsAuthenticated, And, AllowAny]))),
+            'IsAuthenticated'
+        )
+
+    def test_duplicates_are_removed(self):
+        self.assertEqual(self.optimize_groups(['a', Or, 'b', Or, 'a']), 'a or b')
+        self.assertEqual(self.optimize_groups(['a', ['b', 'a']]), 'a and b')
+        self.assertEqual(
+            str(optimize(compile_permissions([IsLucky, Or, IsLucky]))),
+            'tests.test_optimizer.IsLucky or tests.test_optimizer.IsLucky'
+        )
+
+    def test_boolean_identities(self):
+        self.assertEqual(self.optimize_groups([Not, Not, 'a']), 'a')
+        self.assertEqual(self.optimize_groups(['a', And, ['a', Or, 'b']]), 'a')
+        self.assertEqual(self.optimize_groups(['a', Or, ['a', And, 'b']]), 'a')
+        self.assertEqual(self.optimize_groups(['a', Or, Not, 'a']), 'True')
+        self.assertEqual(self.optimize_groups(['a', And, Not, 'a', And, 'b']), 'False')
+
+    def test_to_string(self):
+        self.assertEqual(
+            self.optimize_groups(['admin', Or, ['client', And, Not, 'sales team']]),
+            "admin or client and not 'sales team'"
+        )
+        self.assertEqual(
+            self.optimize_groups([['admin', Or, 'client'], And, Not, ['a', Or, 'b']]),
+            "(admin or client) and not (a or b)"
+        )
+
+    def test_preserves_truth_value(self):
+        rng = random.Random(2)
+        names = ['a', 'b', 'c']
+        for _ in range(1000):
+            expression = compile_expression(
+                random_expression(rng), lambda value: make_group_operand(rng.choice(names))
+            )
+            values = {name: rng.choice([True, False]) for name in names}
+            self.assertEqual(
+                optimize(expression).evaluate(lambda operand: values[operand.value]),
+                expression.evaluate(lambda operand: values[operand.value])
+            )
+
+    def test_describe(self):
+        plan = AccessPlan({'GET': {'groups': ['a', Or, 'a'], 'permissions': [AllowAny]}})
+        self.assertEqual(plan.describe()[('GET', None)], {
+            'groups': 'a', 'permissions': 'True', 'expression': 'groups'
+        })
+        self.assertIsInstance(optimize(Constant(True)), Constant)
@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase
+from rest_framework.permissions import IsAuthenticated
+
+from drf_guard.compiler import (
+    PERMISSION_CLASS, PERMISSION_NAME, compile_groups,
+    compile_groups_and_perms_expr, compile_permissions
+)
+from drf_guard.parser import parse_expression, tokenize
+from tests.testapp.permissions import IsSelfUser
+
+
+class ParserTests(SimpleTestCase):
+    def evaluate(self, expression, groups):
+        compiled = compile_groups(expression)
+        return compiled.evaluate(lambda operand: operand.value in groups)
+
+    def test_precedence(self):
+        expression = "admin or client and not seller"
+        self.assertTrue(self.evaluate(expression, {'admin', 'seller'}))
+        self.assertTrue(self.evaluate(expression, {'client'}))
+        self.assertFalse(self.evaluate(expression, {'client', 'seller'}))
+        self.assertFalse(self.evaluate("(admin or client) and not seller", {'admin', 'seller'}))
+        self.assertTrue(self.evaluate("not not admin", {'admin'}))
+
+    def test_keywords_are_case_insensitive(self):
+        self.assertTrue(self.evaluate("admin OR client", {'client'}))
+
+    def test_quoted_operands(self):
+        self.assertEqual(
+            tokenize("'sales team' and \"or\""),
+            [('operand', 'sales team'), ('and', None), ('operand', 'or')]
+        )
+        self.assertTrue(self.evaluate("'sales team' and admin", {'sales team', 'admin'}))
+
+    def test_syntax_errors(self):
+        for expression in ["admin or", "(admin", "admin)", "and admin", "admin client", "'admin"]:
+            with self.assertRaises(TypeError, msg=expression):
+                compile_groups(expression)
+
+    def test_permissions(self):
+        compiled = compile_permissions(
+            "IsAuthenticated and (tests.testapp.permissions.IsSelfUser or auth.change_user)"
+        )
+        operands = [(operand.value, operand.kind) for operand in compiled.operands()]
+        self.assertEqual(operands, [
+            (IsAuthenticated, PERMISSION_CLASS),
+            (IsSelfUser, PERMISSION_CLASS),
+            ('auth.change_user', PERMISSION_NAME)
+        ])
+
+    def test_expression(self):
+        compiled = compile_groups_and_perms_expr("groups or permissions")
+        self.assertTrue(compiled.evaluate(lambda operand: operand.value == 'permissions'))
+        with self.assertRaises(TypeError):
+            compile_groups_and_perms_expr("groups or perms")
+
+    def test_parsed_expressions_are_cached(self):
+        self.assertIs(compile_groups("admin or client"), compile_groups("admin or client"))
+        self.assertGreater(parse_expression.cache_info().hits, 0)
@@ -0,0 +1,88 @@
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.operators import And, Or, Not
+from drf_guard.permissions import (
+    HasRequiredAccessRules, HasRequiredGroups, HasRequiredPermissions
+)
+from tests.testapp.models import User
+from tests.testapp.permissions import IsSelfUser
+
+
+def build_expression(operands, width):
+    expression = []
+    for index, operand in enumerate(operands[:width]):
+        if index:
+            expression.append(Or if index % 2 else And)
+        if index % 3 == 2:
+            expression.append(Not)
+        expression.append(operand)
+    return expression
+
+
+class QueryCountTests(TestCase):
+    """
+    Number of queries of a permission check must not depend on the size
+    of access rules, fail if a change adds queries to permission checks.
+    """
+    def setUp(self):
+        self.groups = [Group.objects.create(name='group%s' % i) for i in range(32)]
+        self.permissions = [
+            'testapp.%s' % codename
+            for codename in Permission.objects.values_list('codename', flat=True)[:32]
+        ]
+        self.user = User.objects.create(username='user')
+        self.user.groups.set(self.groups[::2])
+
+    def make_request(self, rules):
+        view = type('View', (), {'action': 'update', 'access_rules': {'PUT': rules}})()
+        request = Request(APIRequestFactory().put('/'))
+        # Fresh user, without cached permissions
+        request.user = User.objects.get(pk=self.user.pk)
+        return request, view
+
+    def check(self, permission, request, view):
+        permission.has_permission(request, view)
+        permission.has_object_permission(request, view, request.user)
+
+    def test_groups(self):
+        for width in [1, 8, 32]:
+            groups = build_expression([group.name for group in self.groups], width)
+            request, view = self.make_request({'groups': groups})
+            with self.assertNumQueries(1):
+                self.check(HasRequiredGroups(), request, view)
+
+    def test_constant_groups(self):
+        request, view = self.make_request({'groups': '__any__'})
+        with self.assertNumQueries(0):
+            self.check(HasRequiredGroups(), request, view)
+
+    def test_permission_names(self):
+        for width in [1, 8, 32]:
+            permissions = build_expression(self.permissions, width)
+            request, view = self.make_request({'permissions': permissions})
+            with self.assertNumQueries(2):
+                # User's and groups' permissions
+                self.check(HasRequiredPermissions(), request, view)
+
+    def test_permission_classes(self):
+        permissions = [IsAuthenticated, And, [IsSelfUser, Or, IsAuthenticated]]
+        request, view = self.make_request({'permissions': permissions})
+        with self.assertNumQueries(0):
+            self.check(HasRequiredPermissions(), request, view)
+
+    def test_access_rules(self):
+        for width in [1, 8, 32]:
+            rules = {
+                'groups': build_expression([group.name for group in self.groups], width),
+                'permissions': build_expression(self.permissions, width),
+                # User has none of the permissions, both operands are needed
+                'expression': ['permissions', Or, 'groups'],
+                'reorder': False
+            }
+            request, view = self.make_request(rules)
+            with self.assertNumQueries(3):
+                self.check(HasRequiredAccessRules(), request, view)
@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+from rest_framework.permissions import BasePermission, IsAuthenticated
+
+from drf_guard.compiler import Rule
+from drf_guard.operators import And, Or, Not
+
+
+class IsExpensive(BasePermission):
+    drf_guard_cost = 100
+
+
+class IsCheap(BasePermission):
+    drf_guard_cost = 1
+
+
+class IsUnknown(BasePermission):
+    pass
+
+
+def operand_values(expression):
+    return [operand.value for operand in expression.operands()]
+
+
+class ReorderTests(SimpleTestCase):
+    def test_cheap_operands_are_evaluated_first(self):
+        rule = Rule({'permissions': [IsExpensive, Or, IsCheap, Or, 'app.perm']})
+        self.assertEqual(operand_values(rule.permissions), [IsCheap, 'app.perm', IsExpensive])
+
+    def test_operands_are_not_moved_across_unknown_costs(self):
+        rule = Rule({'permissions': [
+            IsExpensive, And, IsCheap, And, IsUnknown, And, 'app.perm', And, IsAuthenticated
+        ]})
+        self.assertEqual(
+            operand_values(rule.permissions),
+            [IsCheap, IsExpensive, IsUnknown, IsAuthenticated, 'app.perm']
+        )
+
+    def test_sub_expressions(self):
+        rule = Rule({'groups': [[Not, 'a', And, 'b', And, 'c'], Or, 'd']})
+        self.assertEqual(operand_values(rule.groups), ['d', 'a', 'b', 'c'])
+
+    def test_expression(self):
+        rule = Rule({
+            'groups': ['admin'],
+            'permissions': [IsExpensive],
+            'expression': ['permissions', Or, 'groups']
+        })
+        self.assertEqual(operand_values(rule.expression), ['groups', 'permissions'])
+
+    def test_reordering_can_be_disabled(self):
+        rule = Rule({
+            'permissions': [IsExpensive, Or, IsCheap],
+            'reorder': False
+        })
+        self.assertEqual(operand_values(rule.permissions), [IsExpensive, IsCheap])
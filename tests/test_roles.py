@@ -0,0 +1,103 @@
+from unittest import skipIf
+
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.filters import AccessRulesFilter
+from drf_guard.operators import And, Not, Or
+from drf_guard.permissions import HasRequiredAccessRules, HasRequiredGroups
+from drf_guard.roles import ModelMembershipLookup, ObjectRole
+from tests.testapp.models import Project, ProjectMembership, User
+
+try:
+    from asgiref.sync import async_to_sync
+except ImportError:
+    # Django < 3.0
+    async_to_sync = None
+
+
+project_roles = ModelMembershipLookup('testapp.ProjectMembership', 'project')
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'groups': [
+                'admin', Or, ObjectRole('editor', project_roles), Or,
+                ObjectRole('owner', project_roles)
+            ]
+        },
+        'DELETE': {
+            'groups': [ObjectRole('owner', project_roles), And, Not, 'admin']
+        },
+        'PATCH': {
+            'groups': ['admin', And, ObjectRole('owner', project_roles)]
+        }
+    }
+
+
+class ObjectRolesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.user.groups.add(Group.objects.create(name='client'))
+        self.projects = [Project.objects.create(name='project%s' % i) for i in range(6)]
+        for project, role in zip(self.projects, ['editor', 'owner', 'viewer']):
+            ProjectMembership.objects.create(user=self.user, project=project, role=role)
+        self.view = View()
+
+    def get_request(self, method='put'):
+        request = Request(getattr(APIRequestFactory(), method)('/'))
+        request.user = self.user
+        return request
+
+    def test_object_phase(self):
+        request = self.get_request()
+        permission = HasRequiredGroups()
+        # Object roles are checked with objects
+        self.assertTrue(permission.has_permission(request, self.view))
+        with self.assertNumQueries(1):
+            self.assertTrue(permission.has_object_permission(request, self.view, self.projects[0]))
+            self.assertTrue(HasRequiredAccessRules().has_object_permission(
+                request, self.view, self.projects[0]
+            ))
+        self.assertFalse(permission.has_object_permission(request, self.view, self.projects[2]))
+
+    def test_groups_which_decide_without_objects(self):
+        # User isn't in admin group, so object roles aren't needed
+        with self.assertNumQueries(1):
+            self.assertFalse(HasRequiredGroups().has_permission(self.get_request('patch'), self.view))
+
+    def test_roles_are_prefetched_in_a_single_query(self):
+        request = self.get_request('delete')
+        with self.assertNumQueries(2):
+            # User's groups and roles on all projects
+            permitted = HasRequiredGroups().filter_permitted(request, self.view, self.projects)
+            self.assertEqual(
+                HasRequiredAccessRules().filter_permitted(request, self.view, self.projects),
+                permitted
+            )
+        self.assertEqual(permitted, [self.projects[1]])
+
+    @skipIf(async_to_sync is None, "asgiref is required by async checks.")
+    def test_async(self):
+        request = self.get_request()
+        permission = HasRequiredGroups()
+        self.assertTrue(async_to_sync(permission.ahas_object_permission)(
+            request, self.view, self.projects[1]
+        ))
+        self.assertFalse(async_to_sync(permission.ahas_object_permission)(
+            request, self.view, self.projects[3]
+        ))
+
+    def test_filter(self):
+        view = type('View', (), {
+            'action': 'list',
+            'access_rules': {'GET': {'retrieve': View.access_rules['PUT']}}
+        })()
+        queryset = AccessRulesFilter().filter_queryset(
+            self.get_request('get'), Project.objects.order_by('pk'), view
+        )
+        self.assertEqual(list(queryset), self.projects[:2])
@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import Group
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.checks import check_access_rules
+from drf_guard.compiler import get_access_plan
+from drf_guard.permissions import HasRequiredGroups
+from drf_guard.rules_file import AccessRulesFile, get_rules_file
+from tests.testapp.models import User
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class View():
+    action = 'update'
+    access_rules = {'PUT': {'groups': ['client']}}
+
+
+class OtherView():
+    action = 'update'
+
+
+VIEW = 'tests.test_rules_file.View'
+OTHER_VIEW = 'tests.test_rules_file.OtherView'
+
+
+class AccessRulesFileTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'access_rules.json')
+        self.write({
+            VIEW: {'PUT': {'groups': 'admin or staff'}},
+            OTHER_VIEW: {'PUT': {'groups': ['staff']}}
+        })
+        self.user = User.objects.create(username='admin')
+        self.user.groups.add(Group.objects.create(name='admin'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, rules, path=None, content=None):
+        path = path or self.path
+        with open(path, 'w') as f:
+            f.write(json.dumps(rules) if content is None else content)
+        # Make sure the change is noticed whatever the mtime resolution is
+        mtime = getattr(self, 'mtime', 0) + 1
+        os.utime(path, ns=(mtime, mtime))
+        self.mtime = mtime
+
+    def get_request(self):
+        request = Request(APIRequestFactory().put('/'))
+        request.user = self.user
+        return request
+
+    def test_file_rules_take_precedence(self):
+        with override_settings(DRF_GUARD={'ACCESS_RULES_FILE': self.path}):
+            self.assertEqual(str(get_access_plan(View()).get_rule('PUT', 'update').groups), 'admin or staff')
+            self.assertTrue(HasRequiredGroups().has_permission(self.get_request(), View()))
+            self.assertFalse(HasRequiredGroups().has_permission(self.get_request(), OtherView()))
+        self.assertFalse(HasRequiredGroups().has_permission(self.get_request(), View()))
+
+    def test_only_changed_views_are_recompiled(self):
+        rules_file = AccessRulesFile(self.path, 0)
+        view_plan = rules_file.get_plan(View)
+        other_plan = rules_file.get_plan(OtherView)
+
+        self.write({
+            VIEW: {'PUT': {'groups': 'admin or staff'}},
+            OTHER_VIEW: {'PUT': {'groups': ['admin']}}
+        })
+        self.assertIs(rules_file.get_plan(View), view_plan)
+        self.assertIsNot(rules_file.get_plan(OtherView), other_plan)
+        self.assertEqual(str(rules_file.get_plan(OtherView).get_rule('PUT', None).groups), 'admin')
+
+    def test_invalid_changes_keep_old_plans(self):
+        rules_file = AccessRulesFile(self.path, 0)
+        plan = rules_file.get_plan(View)
+        self.write({VIEW: {'PUT': {'groups': 'admin or'}}})
+        with self.assertLogs('drf_guard', 'ERROR'):
+            self.assertIs(rules_file.get_plan(View), plan)
+        self.write(None, content='{')
+        with self.assertLogs('drf_guard', 'ERROR'):
+            self.assertIs(rules_file.get_plan(View), plan)
+
+    @skipIf(yaml is None, "PyYAML isn't installed.")
+    def test_invalid_yaml(self):
+        path = os.path.join(self.directory, 'access_rules.yaml')
+        self.write(None, path, '%s:\n  PUT:\n    groups: [admin]\n' % VIEW)
+        rules_file = AccessRulesFile(path, 0)
+        plan = rules_file.get_plan(View)
+        self.write(None, path, '%s:\n  PUT: [groups: admin\n' % VIEW)
+        with self.assertLogs('drf_guard', 'ERROR'):
+            self.assertIs(rules_file.get_plan(View), plan)
+        with mock.patch('drf_guard.rules_file.parse_rules') as parse_rules:
+            self.assertIs(rules_file.get_plan(View), plan)
+        # The broken file isn't parsed again until it changes
+        parse_rules.assert_not_called()
+
+        with override_settings(DRF_GUARD={'ACCESS_RULES_FILE': path}):
+            errors = check_access_rules()
+        self.assertEqual([error.id for error in errors], ['drf_guard.E003'])
+
+    def test_reloading_is_throttled(self):
+        rules_file = AccessRulesFile(self.path, 60)
+        plan = rules_file.get_plan(View)
+        self.write({VIEW: {'PUT': {'groups': ['staff']}}})
+        self.assertIs(rules_file.get_plan(View), plan)
+
+    def test_toml(self):
+        path = os.path.join(self.directory, 'access_rules.toml')
+        self.write(None, path, '["%s".PUT]\ngroups = ["admin"]\n' % VIEW)
+        rules_file = AccessRulesFile(path)
+        self.assertEqual(str(rules_file.get_plan(View).get_rule('PUT', None).groups), 'admin')
+
+    def test_invalid_files(self):
+        path = os.path.join(self.directory, 'access_rules.ini')
+        self.write(None, path, '')
+        with self.assertRaises(ImproperlyConfigured):
+            AccessRulesFile(path)
+        self.write([VIEW])
+        with self.assertRaises(ImproperlyConfigured):
+            AccessRulesFile(self.path)
+        with override_settings(DRF_GUARD={'ACCESS_RULES_FILE': path + '.missing'}):
+            with self.assertRaises(ImproperlyConfigured):
+                get_rules_file()
+
+    @override_settings(ROOT_URLCONF='tests.test_checks')
+    def test_checks(self):
+        self.write({
+            'tests.test_checks.ValidView': {'GET': {'groups': 'admin'}},
+            VIEW: {'PUT': {'groups': 'admin'}}
+        })
+        with override_settings(DRF_GUARD={'ACCESS_RULES_FILE': self.path}):
+            errors = check_access_rules()
+        self.assertEqual(errors[0].id, 'drf_guard.W004')
+        self.assertNotIn('drf_guard.W004', [error.id for error in errors[1:]])
+
+        path = os.path.join(self.directory, 'broken.json')
+        self.write(None, path, '{')
+        with override_settings(DRF_GUARD={'ACCESS_RULES_FILE': path}):
+            errors = check_access_rules()
+        self.assertEqual([error.id for error in errors], ['drf_guard.E003'])
@@ -0,0 +1,106 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.operators import Or
+from drf_guard.serializers import FieldAccessRulesListSerializer, FieldAccessRulesMixin
+from tests.testapp.models import User
+from tests.testapp.permissions import IsSelfUser
+
+
+class IsEvenUser(BasePermission):
+    batches = []
+
+    def has_object_permission(self, request, view, obj):
+        raise AssertionError('`has_objects_permission` should be used')
+
+    def has_objects_permission(self, request, view, objs):
+        IsEvenUser.batches.append(len(objs))
+        return [obj.pk % 2 == 0 for obj in objs]
+
+
+class UserSerializer(FieldAccessRulesMixin, serializers.ModelSerializer):
+    field_access_rules = {
+        'email': {
+            'groups': ['admin'],
+            'permissions': [IsSelfUser, Or, IsEvenUser],
+            'expression': ['groups', Or, 'permissions']
+        },
+        'phone': {
+            'groups': ['admin']
+        },
+        'full_name': {
+            'permissions': [IsAuthenticated]
+        }
+    }
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'email', 'phone', 'full_name')
+
+
+class UserListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        return [dict(user, listed=True) for user in super().to_representation(data)]
+
+
+class ListedUserSerializer(UserSerializer):
+    class Meta(UserSerializer.Meta):
+        list_serializer_class = UserListSerializer
+
+
+class FieldAccessRulesTests(TestCase):
+    def setUp(self):
+        IsEvenUser.batches = []
+        self.users = [
+            User.objects.create(username='user%s' % i, email='user%s@example.com' % i)
+            for i in range(6)
+        ]
+        self.user = self.users[1]
+
+    def get_context(self, user=None):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = user or self.user
+        return {'request': request, 'view': None}
+
+    def test_object_dependent_fields_are_checked_in_batch(self):
+        serializer = UserSerializer(self.users, many=True, context=self.get_context())
+        self.assertIsInstance(serializer, FieldAccessRulesListSerializer)
+        with self.assertNumQueries(1):
+            # User's groups
+            data = serializer.data
+        self.assertEqual(
+            [user['id'] for user in data if 'email' in user],
+            [user.pk for user in self.users if user.pk % 2 == 0 or user == self.user]
+        )
+        self.assertTrue(all('phone' not in user and 'full_name' in user for user in data))
+        self.assertEqual(IsEvenUser.batches, [5])
+
+    def test_object_independent_fields(self):
+        self.user.groups.add(Group.objects.create(name='admin'))
+        data = UserSerializer(self.users, many=True, context=self.get_context()).data
+        self.assertTrue(all('email' in user and 'phone' in user for user in data))
+        self.assertEqual(IsEvenUser.batches, [])
+
+    def test_single_object(self):
+        user = next(user for user in self.users if user.pk % 2 and user != self.user)
+        data = UserSerializer(user, context=self.get_context()).data
+        self.assertNotIn('email', data)
+        self.assertIn('username', data)
+
+    def test_fields_are_hidden_without_request(self):
+        data = UserSerializer(self.user).data
+        self.assertEqual(set(data), {'id', 'username'})
+
+    def test_list_serializer_class(self):
+        serializer = ListedUserSerializer(self.users, many=True, context=self.get_context())
+        self.assertIsInstance(serializer, UserListSerializer)
+        self.assertIsInstance(serializer, FieldAccessRulesListSerializer)
+        data = serializer.data
+        self.assertTrue(all(user['listed'] and 'phone' not in user for user in data))
+        self.assertEqual(IsEvenUser.batches, [5])
+        self.assertIs(ListedUserSerializer.Meta.list_serializer_class, UserListSerializer)
+        self.assertFalse(hasattr(UserSerializer.Meta, 'list_serializer_class'))
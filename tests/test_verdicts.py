@@ -0,0 +1,185 @@
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import AnonymousUser, Group
+from django.test import TestCase
+from rest_framework.permissions import (
+    AllowAny, BasePermission, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+)
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_guard.compiler import AccessPlan, Rule
+from drf_guard.operators import And, Not, Or
+from drf_guard.permissions import (
+    HasRequiredAccessRules, HasRequiredGroups, HasRequiredPermissions
+)
+from drf_guard.roles import ModelMembershipLookup, ObjectRole
+from tests.testapp.models import User
+
+try:
+    from asgiref.sync import async_to_sync
+except ImportError:
+    # Django < 3.0
+    async_to_sync = None
+
+
+class IsOwner(BasePermission):
+    calls = 0
+
+    def has_permission(self, request, view):
+        IsOwner.calls += 1
+        return request.user.is_authenticated
+
+    def has_object_permission(self, request, view, obj):
+        IsOwner.calls += 1
+        return obj == request.user
+
+
+class IsSignedIn(IsOwner):
+    drf_guard_anonymous = False
+
+
+class RuleVerdictsTests(TestCase):
+    def get_verdict(self, rules, operand, phase='has_permission', anonymous=True,
+                    method=None, action=None):
+        verdicts = Rule(rules, method, action)
+        verdicts = verdicts.anonymous_verdicts if anonymous else verdicts.verdicts
+        return verdicts.get((operand, phase))
+
+    def test_constant_rules(self):
+        self.assertTrue(self.get_verdict({}, 'expression', anonymous=False))
+        self.assertTrue(self.get_verdict({'groups': '__any__'}, 'groups', anonymous=False))
+        self.assertFalse(self.get_verdict({'groups': []}, 'groups', anonymous=False))
+        self.assertTrue(self.get_verdict(
+            {'permissions': [AllowAny, Or, 'app.perm']}, 'permissions', anonymous=False
+        ))
+        # Depends on the user
+        self.assertIsNone(self.get_verdict({'groups': ['admin']}, 'groups', anonymous=False))
+
+    def test_anonymous_users(self):
+        self.assertFalse(self.get_verdict({'groups': ['admin', Or, 'staff']}, 'groups'))
+        self.assertTrue(self.get_verdict({'groups': [Not, 'admin']}, 'groups'))
+        self.assertIsNone(self.get_verdict({'permissions': ['app.perm']}, 'permissions'))
+        self.assertFalse(self.get_verdict({'permissions': [IsAdminUser]}, 'permissions'))
+        self.assertFalse(self.get_verdict(
+            {'permissions': [IsAuthenticated, And, IsOwner]}, 'permissions'
+        ))
+        self.assertFalse(self.get_verdict({'permissions': [IsSignedIn]}, 'permissions'))
+        # Unknown classes and permission names are evaluated
+        self.assertIsNone(self.get_verdict({'permissions': [IsOwner]}, 'permissions'))
+
+    def test_method_dependent_classes(self):
+        rules = {'permissions': [IsAuthenticatedOrReadOnly]}
+        self.assertTrue(self.get_verdict(rules, 'permissions', method='GET'))
+        self.assertFalse(self.get_verdict(rules, 'permissions', method='POST'))
+        # Rule is shared by many methods
+        self.assertIsNone(self.get_verdict(rules, 'permissions'))
+
+    def test_object_phase(self):
+        rules = {
+            'groups': ['admin'],
+            'permissions': [IsAuthenticated, And, IsOwner],
+            'expression': ['groups', Or, 'permissions']
+        }
+        # `IsAuthenticated` doesn't check objects
+        self.assertIsNone(self.get_verdict(rules, 'permissions', 'has_object_permission'))
+        self.assertTrue(self.get_verdict(
+            {'permissions': [IsAuthenticated]}, 'permissions', 'has_object_permission',
+            anonymous=False
+        ))
+
+    def test_skipped_groups(self):
+        rules = {'groups': ['admin'], 'expression': ['groups', And, 'permissions']}
+        self.assertTrue(self.get_verdict(rules, 'groups', action='retrieve'))
+        self.assertTrue(self.get_verdict(rules, 'expression', action='retrieve'))
+        self.assertTrue(self.get_verdict(rules, 'groups', 'has_object_permission', action='list'))
+        self.assertFalse(self.get_verdict(rules, 'groups', 'has_object_permission'))
+
+    def test_object_roles(self):
+        lookup = ModelMembershipLookup('testapp.ProjectMembership', 'project')
+        rules = {'groups': ['admin', Or, ObjectRole('owner', lookup)]}
+        # Roles pass until they are checked with objects
+        self.assertTrue(self.get_verdict(rules, 'groups'))
+        self.assertIsNone(self.get_verdict(rules, 'groups', 'has_object_permission'))
+
+    def test_plan_rules_know_their_method_and_action(self):
+        plan = AccessPlan({
+            'GET': {'groups': ['admin'], 'permissions': [IsAuthenticatedOrReadOnly]},
+            'POST': {'groups': ['admin'], 'permissions': [IsAuthenticatedOrReadOnly]}
+        })
+        anonymous = AnonymousUser()
+        self.assertTrue(
+            plan.get_rule('GET', 'export').get_verdict('permissions', 'has_permission', anonymous)
+        )
+        self.assertFalse(
+            plan.get_rule('POST', 'create').get_verdict('permissions', 'has_permission', anonymous)
+        )
+
+
+class View():
+    action = 'update'
+    access_rules = {
+        'PUT': {
+            'groups': ['admin', Or, 'staff'],
+            'permissions': ['testapp.change_user', Or, [IsSignedIn, And, IsOwner]],
+            'expression': ['groups', Or, 'permissions']
+        },
+        'POST': {
+            'groups': ['admin', Or, 'staff'],
+            'permissions': [IsSignedIn, And, IsOwner],
+            'expression': ['groups', Or, 'permissions']
+        },
+        'PATCH': {
+            'groups': '__any__',
+            'permissions': [IsAuthenticated],
+        }
+    }
+
+
+class PrecomputedVerdictsTests(TestCase):
+    def setUp(self):
+        IsOwner.calls = 0
+        self.user = User.objects.create(username='user')
+        self.user.groups.add(Group.objects.create(name='staff'))
+
+    def get_request(self, method='put', user=None):
+        request = Request(getattr(APIRequestFactory(), method)('/'))
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_anonymous_requests_are_not_evaluated(self):
+        request = self.get_request('post')
+        with self.assertNumQueries(0):
+            for permission in (HasRequiredGroups, HasRequiredPermissions, HasRequiredAccessRules):
+                self.assertFalse(permission().has_permission(request, View()))
+        self.assertEqual(IsOwner.calls, 0)
+
+    @skipIf(async_to_sync is None, "asgiref is required by async checks.")
+    def test_anonymous_async_requests_are_not_evaluated(self):
+        request = self.get_request('post')
+        with self.assertNumQueries(0):
+            for permission in (HasRequiredGroups, HasRequiredPermissions, HasRequiredAccessRules):
+                self.assertFalse(async_to_sync(permission().ahas_permission)(request, View()))
+        self.assertEqual(IsOwner.calls, 0)
+
+    def test_anonymous_permission_names_are_checked_by_backends(self):
+        request = self.get_request()
+        with mock.patch.object(AnonymousUser, 'has_perm', return_value=True) as has_perm:
+            self.assertTrue(HasRequiredPermissions().has_permission(request, View()))
+        has_perm.assert_called_with('testapp.change_user')
+        self.assertFalse(HasRequiredPermissions().has_permission(self.get_request(), View()))
+
+    def test_constant_rules_are_not_evaluated(self):
+        request = self.get_request('patch', self.user)
+        with self.assertNumQueries(0):
+            self.assertTrue(HasRequiredAccessRules().has_permission(request, View()))
+            self.assertTrue(HasRequiredAccessRules().has_object_permission(request, View(), None))
+        self.assertFalse(HasRequiredAccessRules().has_permission(self.get_request('patch'), View()))
+
+    def test_authenticated_users_are_evaluated(self):
+        request = self.get_request(user=self.user)
+        self.assertTrue(HasRequiredAccessRules().has_permission(request, View()))
+        other = User.objects.create(username='other')
+        self.assertFalse(HasRequiredPermissions().has_object_permission(request, View(), other))
+        # Only `IsSignedIn` is evaluated, it short-circuits `IsOwner`
+        self.assertEqual(IsOwner.calls, 1)
@@ -17,3 +17,13 @@ class User(AbstractUser):
     @property
     def is_teacher(self):
         return self.groups.filter(name='teacher').exists()
+
+
+class Project(models.Model):
+    name = models.CharField(max_length=256)
+
+
+class ProjectMembership(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    role = models.CharField(max_length=256)
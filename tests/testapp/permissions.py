@@ -1,5 +1,8 @@
+from django.db.models import Q
 from rest_framework import permissions
 
+from tests.testapp.models import User
+
 
 class IsSelfUser(permissions.BasePermission):
     """
@@ -9,6 +12,9 @@ class IsSelfUser(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return obj == request.user
 
+    def object_permission_filter(self, request, view):
+        return Q(pk=request.user.pk)
+
 
 class IsAdminUser(permissions.BasePermission):
     """
@@ -21,6 +27,9 @@ class IsAdminUser(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return request.user.is_authenticated and request.user.is_admin
 
+    def object_permission_filter(self, request, view):
+        return self.has_permission(request, view)
+
 
 class IsTeacherAccessingStudent(permissions.BasePermission):
     """
@@ -29,3 +38,9 @@ class IsTeacherAccessingStudent(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return request.user.is_teacher and obj.is_student
+
+    def object_permission_filter(self, request, view):
+        if not request.user.is_teacher:
+            return False
+        students = User.objects.filter(groups__name='student')
+        return Q(pk__in=students.values('pk'))
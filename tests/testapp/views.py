@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from tests.testapp.models import User
 from tests.testapp.serializers import UserSerializer
 
+from drf_guard.filters import AccessRulesFilter
 from drf_guard.operators import And, Or, Not
 from .permissions import IsAdminUser, IsSelfUser, IsTeacherAccessingStudent
 from drf_guard.permissions import HasRequiredGroups, HasRequiredPermissions
@@ -42,3 +43,19 @@ class UserViewSet(viewsets.ModelViewSet):
             'permissions': [IsAuthenticated]
         }
     }
+
+
+class FilteredUserViewSet(viewsets.ReadOnlyModelViewSet):
+    """API endpoint that lists only users which can be retrieved."""
+    queryset = User.objects.order_by('pk')
+    serializer_class = UserSerializer
+    permission_classes = (HasRequiredGroups, HasRequiredPermissions)
+    filter_backends = (AccessRulesFilter,)
+    access_rules = {
+        'GET': {
+            'list': {
+                'permissions': [IsAuthenticated]
+            },
+            'retrieve': UserViewSet.access_rules['GET']['retrieve']
+        }
+    }
@@ -23,6 +23,7 @@ from rest_framework import routers
 router = routers.DefaultRouter()
 
 router.register('users', views.UserViewSet, 'user')
+router.register('filtered-users', views.FilteredUserViewSet, 'filtered-user')
 
 urlpatterns = [
     url('', include(router.urls))